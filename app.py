@@ -1,18 +1,40 @@
 from flask import Flask, render_template, request, redirect, url_for, jsonify, current_app, url_for, send_file
-from flask import Flask, render_template, request, session
+from flask import Flask, render_template, request, session, Response, stream_with_context, g
 from flask_login import login_required, current_user
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 from flask_login import LoginManager, login_user, login_required, logout_user, UserMixin, current_user
 from werkzeug.utils import secure_filename
 from flask_bcrypt import Bcrypt
 from pymongo import MongoClient
+from pymongo.errors import DuplicateKeyError
 from bson.objectid import ObjectId
+from bson.errors import InvalidId
 from config import Config
-from services.ai_engine import generate_feedback
+from services.ai_engine import generate_feedback, agenerate_feedback, generate_feedback_batch, PROMPT_VERSION, BATCH_PROMPT_VERSION
+from services import model_registry
+from services import transcription
+from services import transcription_stream
+from services import feedback_cache
+from services import llm_executor
+from services import sse_bridge
+from services import quiz_pool
+from services import history_manager
+from services import session_store
+from services import retriever_cache
+from services import resume_index
+from services import embedding_service
+from services import ingest_jobs
+from services import retrieval_cache
+from services import rag_sessions
+from services import store_maintenance
+from services import db_indexes
+from services import user_stats
+from services import usage_quota
 import random
 import os
-import whisper
 import json
+import click
+import shutil
 from datetime import datetime, timedelta, timezone
 from itsdangerous import URLSafeTimedSerializer
 import smtplib
@@ -32,39 +54,58 @@ from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 import uuid
+import base64
 from flask_login import login_required, current_user
 from bson import ObjectId
-from langchain_community.document_loaders import PyPDFLoader, TextLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
 
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
 # =================== Models ===================
-embedding_model = HuggingFaceEmbeddings(
-    model_name="BAAI/bge-small-en",
-    model_kwargs={'device': 'cpu'},
-    encode_kwargs={'normalize_embeddings': False}
-)
+# Heavy models are loaded on first use through the registry.
+# Set PRELOAD_MODELS (e.g. "whisper,embedding") to warm them at startup.
+
+def _load_whisper():
+    import whisper
+    return whisper.load_model(Config.WHISPER_MODEL, device="cpu")
+
+
+def _load_embedding_model():
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(
+        model_name="BAAI/bge-small-en",
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'normalize_embeddings': False}
+    )
 
-chat_model = ChatGroq(
-    groq_api_key=GROQ_API_KEY,
-    model="llama-3.1-8b-instant",
-    temperature=0.2,
-    max_tokens=512
-)
+
+def _load_chat_model():
+    return ChatGroq(
+        groq_api_key=GROQ_API_KEY,
+        model="llama-3.1-8b-instant",
+        temperature=0.2,
+        max_tokens=512
+    )
 
 
 load_dotenv()
 
-llm = ChatGroq(
-    model="llama-3.1-8b-instant",
-    temperature=0.2,
-    max_tokens=2000,
-    max_retries=2
-)
+
+def _load_llm():
+    return ChatGroq(
+        model="llama-3.1-8b-instant",
+        temperature=0.2,
+        max_tokens=2000,
+        max_retries=2
+    )
+
+
+model_registry.register("whisper", _load_whisper)
+model_registry.register("embedding", _load_embedding_model)
+model_registry.register("chat_model", _load_chat_model)
+model_registry.register("llm", _load_llm)
+
+LLM_TIMEOUT_REPLY = sse_bridge.TIMEOUT_REPLY
 
 
 
@@ -98,10 +139,27 @@ db = client[app.config["DB_NAME"]]
 
 users_collection = db["users"]
 interviews_collection = db["interviews"]
+feedback_cache_collection = db["feedback_cache"]
+
+quiz_questions_collection = db["quiz_questions"]
+
+feedback_cache.init(feedback_cache_collection)
+user_stats.init(db["user_stats"], interviews_collection)
+usage_quota.init(db["usage_counters"])
+quiz_pool.init(quiz_questions_collection)
+session_store.init(db["interview_sessions"])
+rag_sessions.init(db["rag_interviews"])
+ingest_jobs.init(db["ingest_jobs"])
+store_maintenance.init(
+    users_collection, db["rag_interviews"], db["maintenance_locks"], UPLOAD_FOLDER
+)
 
 login_manager = LoginManager(app)
 login_manager.login_view = "login"
-model = whisper.load_model("tiny", device="cpu")
+
+if Config.PRELOAD_MODELS:
+    model_registry.preload(Config.PRELOAD_MODELS.split(","))
+
 QUESTIONS = [
     "Tell me about yourself",
     "Why should we hire you?",
@@ -151,12 +209,54 @@ def allowed_file(filename):
     return "." in filename and \
         filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
+
+def resume_too_large(file_storage):
+    # Checked on the upload itself, before it can replace the stored resume
+    if request.content_length and request.content_length <= Config.RESUME_MAX_BYTES:
+        return False
+
+    stream = file_storage.stream
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+    return size > Config.RESUME_MAX_BYTES
+
+
+# ---------------- Request-scoped user document ----------------
+# The user document is fetched once per request and shared by Flask-Login,
+# the context processors, premium_required and the routes. Anything that
+# writes to the user calls invalidate_user_doc() so the rest of the
+# request (e.g. the rendered template) sees the new values.
+
+USER_PROJECTION = {"password": 0}
+
+
+def current_user_doc(user_id=None):
+    if user_id is None:
+        if not current_user.is_authenticated:
+            return None
+        user_id = current_user.id
+
+    docs = g.setdefault("user_docs", {})
+    if user_id not in docs:
+        try:
+            docs[user_id] = users_collection.find_one(
+                {"_id": ObjectId(user_id)}, USER_PROJECTION
+            )
+        except InvalidId:
+            docs[user_id] = None
+
+    return docs[user_id]
+
+
+def invalidate_user_doc(user_id=None):
+    g.get("user_docs", {}).pop(user_id or current_user.id, None)
+
+
 @app.context_processor
 def inject_user_subscription():
     if current_user.is_authenticated:
-        user = users_collection.find_one(
-            {"_id": ObjectId(current_user.id)}
-        )
+        user = current_user_doc()
         return {
             "subscription": user.get("subscription", "free")
         }
@@ -168,23 +268,32 @@ def inject_user_subscription():
 @app.context_processor
 def inject_user():
     if current_user.is_authenticated:
-        user = users_collection.find_one(
-            {"_id": ObjectId(current_user.id)}
-        )
+        user = current_user_doc()
         return dict(user=user)
     return dict(user=None)
 
 def premium_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        user = users_collection.find_one(
-            {"_id": ObjectId(current_user.id)}
-        )
+        user = current_user_doc()
 
         if not user or user.get("subscription") != "premium":
             return redirect("/usage")
 
-        return f(*args, **kwargs)
+        # ensure_sync lets this wrap async views too
+        return current_app.ensure_sync(f)(*args, **kwargs)
+    return decorated_function
+
+def admin_required(f):
+    # Operational pages expose per-process internals; hidden from everyone else
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        user = current_user_doc()
+
+        if not user or (user.get("email") or "").lower() not in Config.ADMIN_EMAILS:
+            return jsonify({"error": "Not found"}), 404
+
+        return current_app.ensure_sync(f)(*args, **kwargs)
     return decorated_function
 
 def generate_reset_token(email):
@@ -313,7 +422,7 @@ class User(UserMixin):
 
 @login_manager.user_loader
 def load_user(user_id):
-    user = users_collection.find_one({"_id": ObjectId(user_id)})
+    user = current_user_doc(user_id)
     if user:
         return User(user)
     return None
@@ -371,28 +480,125 @@ def transcribe_audio():
         return jsonify({"error": "No audio file"}), 400
 
     audio_file = request.files["audio"]
-    file_path = "temp_audio.webm"
-    audio_file.save(file_path)
+    suffix = os.path.splitext(audio_file.filename or "")[1] or ".webm"
 
     try:
-        result = model.transcribe(file_path)
-        text = result["text"]
+        text = transcription.transcribe(audio_file.read(), suffix=suffix)
 
         return jsonify({"text": text})
 
+    except transcription.QueueFull:
+        response = jsonify({"error": "Transcription is busy, please retry shortly."})
+        response.headers["Retry-After"] = str(Config.TRANSCRIBE_RETRY_AFTER)
+        return response, 429
+
+    except transcription.TranscriptionTimeout:
+        return jsonify({"error": "Transcription timed out."}), 504
+
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-    finally:
-        if os.path.exists(file_path):
-            os.remove(file_path)
+
+# ================= CHUNKED TRANSCRIPTION =================
+
+@app.route("/transcribe/stream", methods=["POST"])
+@login_required
+@premium_required
+def transcribe_stream_open():
+    stream = transcription_stream.open_stream(current_user.id)
+    return jsonify({"stream_id": stream.id}), 201
+
+
+@app.route("/transcribe/stream/<stream_id>/chunk", methods=["POST"])
+@login_required
+@premium_required
+def transcribe_stream_chunk(stream_id):
+
+    if "audio" not in request.files:
+        return jsonify({"error": "No audio file"}), 400
+
+    audio_file = request.files["audio"]
+    suffix = os.path.splitext(audio_file.filename or "")[1] or ".webm"
+    seq = request.form.get("seq", type=int)
+
+    if seq is None:
+        return jsonify({"error": "Missing chunk sequence number"}), 400
+
+    try:
+        stream = transcription_stream.add_chunk(
+            stream_id, current_user.id, seq, audio_file.read(), suffix
+        )
+    except transcription_stream.StreamNotFound:
+        return jsonify({"error": "Unknown or closed stream"}), 404
+    except transcription_stream.TooManyChunks:
+        response = jsonify({"error": "Too many pending chunks"})
+        response.headers["Retry-After"] = str(Config.TRANSCRIBE_RETRY_AFTER)
+        return response, 429
+
+    return jsonify(stream.status()), 202
+
+
+@app.route("/transcribe/stream/<stream_id>", methods=["GET"])
+@login_required
+@premium_required
+def transcribe_stream_status(stream_id):
+    try:
+        stream = transcription_stream.get_stream(stream_id, current_user.id)
+    except transcription_stream.StreamNotFound:
+        return jsonify({"error": "Unknown stream"}), 404
+
+    return jsonify(stream.status())
+
+
+@app.route("/transcribe/stream/<stream_id>/events", methods=["GET"])
+@login_required
+@premium_required
+def transcribe_stream_events(stream_id):
+    try:
+        stream = transcription_stream.get_stream(stream_id, current_user.id)
+    except transcription_stream.StreamNotFound:
+        return jsonify({"error": "Unknown stream"}), 404
+
+    def generate():
+        # Ends with the stream: finished, failed, or expired after
+        # TRANSCRIBE_STREAM_TTL of inactivity (a vanished client never
+        # makes the keep-alive write fail under every server)
+        version = -1
+        while True:
+            status = transcription_stream.wait_for_change(stream, version)
+            if status["version"] != version:
+                version = status["version"]
+                yield f"data: {json.dumps(status)}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+            if status["status"] in ("done", "failed") or \
+                    not transcription_stream.is_active(stream):
+                break
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.route("/transcribe/stream/<stream_id>/close", methods=["POST"])
+@login_required
+@premium_required
+def transcribe_stream_close(stream_id):
+    try:
+        status = transcription_stream.close_stream(stream_id, current_user.id)
+    except transcription_stream.StreamNotFound:
+        return jsonify({"error": "Unknown stream"}), 404
+
+    return jsonify(status)
 
 
 @app.route("/profile", methods=["GET", "POST"])
 @login_required
 def profile():
 
-    user = users_collection.find_one({"_id": ObjectId(current_user.id)})
+    user = current_user_doc()
 
     if not user:
         return redirect("/dashboard")
@@ -465,6 +671,9 @@ def profile():
         if resume_file and resume_file.filename != "":
             if allowed_file(resume_file.filename):
 
+                if resume_too_large(resume_file):
+                    return "Resume file is too large."
+
                 filename = secure_filename(f"{current_user.id}_resume.pdf")
                 path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
                 resume_file.save(path)
@@ -494,6 +703,7 @@ def profile():
             {"_id": ObjectId(current_user.id)},
             {"$set": {"profile": profile_data}}
         )
+        invalidate_user_doc()
 
         return redirect("/profile")
 
@@ -507,28 +717,123 @@ def profile():
         profile_strength=profile_strength
     )
 
+# ---------------- History pagination ----------------
+# Keyset pagination on (created_at, _id), newest first. The cursor is the
+# last item's position, so every page costs the same index range scan no
+# matter how deep the user scrolls. List items leave out the answer and
+# the long feedback text; /history/<id> loads those on demand.
+
+HISTORY_LIST_PROJECTION = {
+    "question": 1,
+    "interview_type": 1,
+    "created_at": 1,
+    "feedback.grammar_score": 1,
+    "feedback.confidence_score": 1,
+    "feedback.technical_score": 1,
+    "feedback.overall_score": 1
+}
+
+
+def encode_history_cursor(item):
+    created_at = item.get("created_at")
+    stamp = created_at.isoformat() if created_at else ""
+    return base64.urlsafe_b64encode(f"{stamp}|{item['_id']}".encode()).decode()
+
+
+def decode_history_cursor(cursor):
+    try:
+        stamp, item_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return (datetime.fromisoformat(stamp) if stamp else None), ObjectId(item_id)
+    except (ValueError, InvalidId):
+        return None
+
+
+def history_page(user_id, cursor=None, limit=None):
+    limit = max(1, min(limit or Config.HISTORY_PAGE_SIZE, Config.HISTORY_MAX_PAGE_SIZE))
+    query = {"user_id": user_id}
+
+    position = decode_history_cursor(cursor) if cursor else None
+    if position:
+        created_at, item_id = position
+        if created_at is None:
+            # Undated (older) interviews sort last
+            query.update({"created_at": None, "_id": {"$lt": item_id}})
+        else:
+            query["$or"] = [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": item_id}},
+                {"created_at": None}
+            ]
+
+    items = list(
+        interviews_collection.find(query, HISTORY_LIST_PROJECTION)
+        .sort([("created_at", -1), ("_id", -1)])
+        .limit(limit + 1)
+    )
+
+    next_cursor = encode_history_cursor(items[limit - 1]) if len(items) > limit else None
+    return items[:limit], next_cursor
+
+
+def history_item_json(item):
+    item = dict(item)
+    item["_id"] = str(item["_id"])
+    if item.get("created_at"):
+        item["created_at"] = item["created_at"].isoformat()
+    return item
+
+
 @app.route("/history")
 @login_required
 def history():
 
-    interviews = list(
-        interviews_collection.find(
-            {"user_id": current_user.id}
-        ).sort("created_at", -1)
-    )
+    interviews, next_cursor = history_page(current_user.id, request.args.get("cursor"))
 
     return render_template(
         "history.html",
-        interviews=interviews
+        interviews=interviews,
+        next_cursor=next_cursor
+    )
+
+@app.route("/history/page")
+@login_required
+def history_page_json():
+
+    interviews, next_cursor = history_page(
+        current_user.id,
+        request.args.get("cursor"),
+        request.args.get("limit", type=int)
     )
 
+    return jsonify({
+        "items": [history_item_json(item) for item in interviews],
+        "next_cursor": next_cursor
+    })
+
+
+@app.route("/history/<interview_id>")
+@login_required
+def history_detail(interview_id):
+
+    try:
+        item = interviews_collection.find_one(
+            {"_id": ObjectId(interview_id), "user_id": current_user.id}
+        )
+    except InvalidId:
+        item = None
+
+    if not item:
+        return jsonify({"error": "Interview not found"}), 404
+
+    item.pop("user_id", None)
+    return jsonify(history_item_json(item))
+
+
 @app.route("/download-resume")
 @login_required
 def download_resume():
 
-    user = users_collection.find_one(
-        {"_id": ObjectId(current_user.id)}
-    )
+    user = current_user_doc()
 
     resume_filename = user.get("resume")
 
@@ -549,12 +854,15 @@ def register():
             request.form["password"]
         ).decode("utf-8")
 
-        users_collection.insert_one({
-            "name": request.form["name"],
-            "email": request.form["email"],
-            "password": hashed_pw,
-            "subscription": "free"
-        })
+        try:
+            users_collection.insert_one({
+                "name": request.form["name"],
+                "email": request.form["email"],
+                "password": hashed_pw,
+                "subscription": "free"
+            })
+        except DuplicateKeyError:
+            return "An account with this email already exists."
 
         return redirect("/login")
 
@@ -605,9 +913,7 @@ TECH_QUESTIONS = [
 @premium_required
 def improve_skill():
 
-    user = users_collection.find_one(
-        {"_id": ObjectId(current_user.id)}
-    )
+    user = current_user_doc()
 
     questions = None
     score = None
@@ -622,40 +928,8 @@ def improve_skill():
             selected_language = request.form.get("language")
             selected_difficulty = request.form.get("difficulty")
 
-            prompt = f"""
-You are an expert technical interviewer.
-
-Generate 10 {selected_difficulty} level multiple choice questions for {selected_language} Programming Language.
-
-Return ONLY valid JSON in this format:
-
-{{
-  "questions": [
-    {{
-      "question": "Question text",
-      "options": ["Option A", "Option B", "Option C", "Option D"],
-      "answer": "A"
-    }}
-  ]
-}}
-
-Rules:
-- Return ONLY raw JSON
-- No explanation
-- No markdown
-- No extra text
-- Answer must be A, B, C, or D only
-"""
-
             try:
-                response = llm.invoke(prompt)
-                print(response)
-                response_text = response.content.strip()
-                response_text = response_text.replace("```json", "")
-                response_text = response_text.replace("```", "")
-                response_text = response_text.strip()
-                data = json.loads(response_text)
-                questions = data.get("questions", [])
+                questions = quiz_pool.get_quiz(selected_language, selected_difficulty)
 
             except Exception as e:
                 print("Groq LLM Error:", str(e))
@@ -688,13 +962,146 @@ Rules:
     )
 
 
+def build_feedback(ai_response, subscription, interview_type):
+
+    # Safety fallback if AI fails
+    if not ai_response or not isinstance(ai_response, dict):
+        ai_response = {}
+
+    # ================= SAFE EXTRACTION =================
+    grammar_score = ai_response.get("grammar_score", 5)
+    confidence_score = ai_response.get("confidence_score", 5)
+    improved_answer = ai_response.get(
+        "improved_answer",
+        "Could not generate improved answer."
+    )
+
+    # Only for premium + technical
+    technical_score = None
+    if subscription == "premium" and interview_type == "technical":
+        technical_score = ai_response.get("technical_depth_score", 5)
+
+    # Optional advanced fields
+    clarity_score = ai_response.get("clarity_score")
+    overall_score = ai_response.get("overall_score")
+    strengths = ai_response.get("strengths")
+    weaknesses = ai_response.get("weaknesses")
+    suggestions = ai_response.get("suggestions")
+
+    return {
+        "grammar_score": grammar_score,
+        "confidence_score": confidence_score,
+        "technical_score": technical_score,
+        "clarity_score": clarity_score,
+        "overall_score": overall_score,
+        "strengths": strengths,
+        "weaknesses": weaknesses,
+        "suggestions": suggestions,
+        "improved_answer": improved_answer
+    }
+
+
+def rescore_user_history(user_id, subscription):
+
+    interviews = list(
+        interviews_collection.find(
+            {"user_id": user_id, "answer": {"$exists": True}},
+            {"question": 1, "answer": 1, "interview_type": 1}
+        )
+    )
+
+    results = generate_feedback_batch(
+        [
+            {
+                "question": item.get("question", ""),
+                "answer": item.get("answer", ""),
+                "interview_type": item.get("interview_type", "hr")
+            }
+            for item in interviews
+        ],
+        advanced=subscription == "premium"
+    )
+
+    updated = 0
+    failed = 0
+
+    for item, result in zip(interviews, results):
+        if not result["feedback"]:
+            failed += 1
+            continue
+
+        interviews_collection.update_one(
+            {"_id": item["_id"]},
+            {"$set": {
+                "feedback": build_feedback(
+                    result["feedback"], subscription, item.get("interview_type", "hr")
+                ),
+                "rescored_at": datetime.now(timezone.utc),
+                "prompt_version": PROMPT_VERSION
+            }}
+        )
+        updated += 1
+
+    if updated:
+        user_stats.rebuild(user_id)
+
+    return {"total": len(interviews), "updated": updated, "failed": failed}
+
+
+@app.route("/evaluate/batch", methods=["POST"])
+@login_required
+@premium_required
+def evaluate_batch():
+
+    items = (request.get_json(silent=True) or {}).get("items", [])
+
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Provide a non-empty 'items' list"}), 400
+
+    if len(items) > Config.BATCH_MAX_ITEMS:
+        return jsonify({"error": f"At most {Config.BATCH_MAX_ITEMS} items per request"}), 400
+
+    if not all(isinstance(item, dict) for item in items):
+        return jsonify({"error": "Each item must be an object with an 'answer'"}), 400
+
+    results = generate_feedback_batch(items, advanced=True)
+
+    return jsonify({"results": results})
+
+
+@app.route("/rescore-history", methods=["POST"])
+@login_required
+@premium_required
+def rescore_history():
+    summary = rescore_user_history(current_user.id, "premium")
+    return jsonify(summary)
+
+
+@app.cli.command("rescore-history")
+@click.argument("user_id")
+def rescore_history_command(user_id):
+    user = users_collection.find_one({"_id": ObjectId(user_id)}, {"subscription": 1})
+    if not user:
+        print("User not found")
+        return
+    summary = rescore_user_history(user_id, user.get("subscription", "free"))
+    print(json.dumps(summary, indent=2))
+
+
+@app.cli.command("refill-quiz-pool")
+@click.argument("language")
+@click.argument("difficulty")
+def refill_quiz_pool_command(language, difficulty):
+    # Run off-peak (e.g. from cron) so quiz generation doesn't cluster at peak hours
+    quiz_pool.refill(language, difficulty)
+    print(f"{language}/{difficulty}: {quiz_pool.count(language, difficulty)} questions in pool")
+
+
 @app.route("/dashboard", methods=["GET", "POST"])
 @login_required
-def dashboard():
+async def dashboard():
 
-    user_data = users_collection.find_one(
-        {"_id": ObjectId(current_user.id)}
-    )
+    user_data = current_user_doc()
 
     subscription = user_data.get("subscription", "free")
 
@@ -705,24 +1112,19 @@ def dashboard():
     feedback = None
     limit_reached = False
 
-    #  Use timezone aware datetime (fixes deprecation warning)
-    one_week_ago = datetime.now(timezone.utc) - timedelta(days=7)
-    FREE_LIMIT = 20
+    FREE_LIMIT = Config.FREE_WEEKLY_LIMIT
 
-    weekly_sessions = interviews_collection.count_documents({
-        "user_id": current_user.id,
-        "created_at": {"$gte": one_week_ago}
-    })
+    weekly_sessions = usage_quota.used(current_user.id)
 
     # ================= POST =================
     if request.method == "POST":
 
-        weekly_sessions = interviews_collection.count_documents({
-            "user_id": current_user.id,
-            "created_at": {"$gte": one_week_ago}
-        })
+        # Checks and takes a slot in one atomic update (premium: count only)
+        bucket = usage_quota.reserve(
+            current_user.id, FREE_LIMIT if subscription == "free" else None
+        )
 
-        if subscription == "free" and weekly_sessions >= FREE_LIMIT:
+        if bucket is None:
             limit_reached = True
         else:
             question = request.form["question"]
@@ -732,74 +1134,43 @@ def dashboard():
             #  Premium users get advanced evaluation
             advanced_mode = True if subscription == "premium" else False
 
-            ai_response = generate_feedback(
-                answer=answer,
-                interview_type=interview_type,
-                advanced=advanced_mode
-            )
-
-            # Safety fallback if AI fails
-            if not ai_response or not isinstance(ai_response, dict):
-                ai_response = {}
-
-            # ================= SAFE EXTRACTION =================
-            grammar_score = ai_response.get("grammar_score", 5)
-            confidence_score = ai_response.get("confidence_score", 5)
-            improved_answer = ai_response.get(
-                "improved_answer",
-                "Could not generate improved answer."
-            )
-
-            # Only for premium + technical
-            technical_score = None
-            if subscription == "premium" and interview_type == "technical":
-                technical_score = ai_response.get("technical_depth_score", 5)
-
-            # Optional advanced fields
-            clarity_score = ai_response.get("clarity_score")
-            overall_score = ai_response.get("overall_score")
-            strengths = ai_response.get("strengths")
-            weaknesses = ai_response.get("weaknesses")
-            suggestions = ai_response.get("suggestions")
-
-            feedback = {
-                "grammar_score": grammar_score,
-                "confidence_score": confidence_score,
-                "technical_score": technical_score,
-                "clarity_score": clarity_score,
-                "overall_score": overall_score,
-                "strengths": strengths,
-                "weaknesses": weaknesses,
-                "suggestions": suggestions,
-                "improved_answer": improved_answer
-            }
+            try:
+                ai_response = await agenerate_feedback(
+                    answer=answer,
+                    interview_type=interview_type,
+                    advanced=advanced_mode
+                )
+
+                feedback = build_feedback(ai_response, subscription, interview_type)
+
+                interview = {
+                    "user_id": current_user.id,
+                    "question": question,
+                    "answer": answer,
+                    "interview_type": interview_type,
+                    "feedback": feedback,
+                    "created_at": datetime.now(timezone.utc)
+                }
+                interviews_collection.insert_one(interview)
+            except Exception:
+                usage_quota.release(bucket)
+                raise
 
-            interviews_collection.insert_one({
-                "user_id": current_user.id,
-                "question": question,
-                "answer": answer,
-                "interview_type": interview_type,
-                "feedback": feedback,
-                "created_at": datetime.now(timezone.utc)
-            })
+            user_stats.record(interview)
 
             weekly_sessions += 1
 
-    # ================= FETCH HISTORY =================
-    interviews = list(
-        interviews_collection.find(
-            {"user_id": current_user.id}
-        ).sort("created_at", -1)
-    )
+    # ================= STATS =================
+    stats = user_stats.get(current_user.id)
 
-    recent_interviews = interviews[:3]
+    recent_interviews = stats["recent"][:3]
 
     scores = [
         item.get("feedback", {}).get("confidence_score", 0)
-        for item in interviews
+        for item in stats["recent"]
     ]
 
-    avg_confidence = sum(scores) / len(scores) if scores else 0
+    avg_confidence = user_stats.average(stats, "confidence_score")
     readiness = round((avg_confidence / 10) * 100, 1)
 
     return render_template(
@@ -817,73 +1188,79 @@ def dashboard():
         subscription=subscription
     )
 
-user_data = {}
-
 # =================== Helper Functions ===================
 
-def load_resume_document(file_path):
-    if file_path.lower().endswith(".pdf"):
-        loader = PyPDFLoader(file_path)
-        return loader.load()
-    elif file_path.lower().endswith(".txt"):
-        loader = TextLoader(file_path, encoding="utf-8")
-        return loader.load()
-    else:
-        raise ValueError("Unsupported format")
+RESUME_PROCESSING_REPLY = "⏳ Your resume is still being processed. Please try again in a moment."
+RESUME_FAILED_REPLY = "❌ Could not process your resume: {error}. Please upload it again."
 
 
-def create_resume_vectorstore(user_id, resume_path):
+def open_resume_vectorstore(user_id):
+    if not resume_index.has_resume(user_id):
+        return None
+    return resume_index.shared_store()
 
-    documents = load_resume_document(resume_path)
 
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=100
-    )
-    docs = splitter.split_documents(documents)
+retriever_cache.init(open_resume_vectorstore)
 
-    # Unique folder per user
-    persist_dir = os.path.join(
-        app.config["UPLOAD_FOLDER"],
-        "chroma_store",
-        user_id
-    )
-
-    os.makedirs(persist_dir, exist_ok=True)
 
-    vectorstore = Chroma.from_documents(
-        documents=docs,
-        embedding=embedding_model,
-        persist_directory=persist_dir
-    )
+def start_resume_ingestion(user_id, resume_path):
+    # Parsing and embedding run on the ingest workers; returns the job id
+    return ingest_jobs.enqueue(user_id, resume_path)
 
-    vectorstore.persist()
 
-    retriever = vectorstore.as_retriever(search_kwargs={"k": 3})
+def get_resume_retriever(user_id, resume_filename=None):
+    retriever = retriever_cache.get_retriever(user_id)
 
-    user_data[user_id] = {
-        "vectorstore": vectorstore,
-        "retriever": retriever,
-        "chat_history": []
-    }
+    if retriever is None and resume_filename and not ingest_jobs.active_job(user_id):
+        # Nothing indexed yet: queue the stored resume for ingestion,
+        # unless this very file already failed (it would fail again)
+        resume_path = os.path.join(app.config["UPLOAD_FOLDER"], "user_resumes", resume_filename)
+        if not ingest_jobs.last_failure(user_id, resume_path):
+            start_resume_ingestion(user_id, resume_path)
 
     return retriever
 
 
-def get_current_doc(user_id):
-    return user_data.get(user_id)
+def resume_ingest_error(user_id):
+    job = ingest_jobs.last_failure(user_id)
+    if not job:
+        return None
+    return job.get("error") or "unknown error"
+
+
+def resume_unavailable_reply(user_id):
+    error = resume_ingest_error(user_id)
+    return RESUME_FAILED_REPLY.format(error=error) if error else RESUME_PROCESSING_REPLY
+
+
+def active_ingest_job_id(user_id):
+    job = ingest_jobs.active_job(user_id)
+    return str(job["_id"]) if job else None
+
+
+def retrieve_resume_docs(user_id, query):
+    entry = retriever_cache.get(user_id)
+    if not entry:
+        return []
 
+    docs = retrieval_cache.get(user_id, entry["version"], query)
+    if docs is None:
+        docs = entry["retriever"].invoke(query)
+        retrieval_cache.put(user_id, entry["version"], query, docs)
 
-def rag_interview_response(user_input, user_id, mode="resume_mixed"):
+    return docs
 
-    doc_session = get_current_doc(user_id)
-    if not doc_session:
-        return "⚠ Please upload your resume first."
 
-    retriever = doc_session["retriever"]
-    chat_history = doc_session["chat_history"]
+def load_rag_history(user_id):
+    # Resume interview history, compacted to its token budget
+    return rag_sessions.compact(
+        user_id, rag_sessions.load(user_id), Config.RAG_HISTORY_TOKEN_BUDGET
+    )
+
+
+def build_rag_messages(user_input, user_id, chat_history):
 
-    relevant_docs = retriever.invoke(user_input)
+    relevant_docs = retrieve_resume_docs(user_id, user_input)
     context_text = "\n\n".join([d.page_content for d in relevant_docs])
 
     system_prompt = f"""
@@ -901,27 +1278,51 @@ Context:
 
 
     messages = [SystemMessage(content=system_prompt)]
-    messages.extend(chat_history)
+    messages.extend(history_manager.to_messages(chat_history))
     messages.append(HumanMessage(content=user_input))
 
-    response = chat_model.invoke(messages)
+    return messages
+
+
+async def rag_interview_response(user_input, user_id, mode="resume_mixed"):
+
+    retriever = get_resume_retriever(user_id)
+    if not retriever:
+        return resume_unavailable_reply(user_id)
 
-    chat_history.append(HumanMessage(content=user_input))
-    chat_history.append(AIMessage(content=response.content))
+    chat_history = load_rag_history(user_id)
+    messages = build_rag_messages(user_input, user_id, chat_history)
+
+    try:
+        response = await llm_executor.ainvoke(model_registry.get("chat_model"), messages)
+    except llm_executor.LLMTimeout:
+        return LLM_TIMEOUT_REPLY
+
+    rag_sessions.append_turn(user_id, user_input, response.content, resume_version(user_id))
 
     return response.content
 
 
+def resume_version(user_id):
+    entry = retriever_cache.get(user_id)
+    return entry["version"] if entry else None
+
+
+def rag_display_history(user_id):
+    return [
+        {"role": "ai" if m["role"] == "ai" else "user", "content": m["content"]}
+        for m in history_manager.visible_turns(rag_sessions.load(user_id))
+    ]
+
+
 # =================== Final Interview Route ===================
 
 @app.route("/final-interview", methods=["GET", "POST"])
 @login_required
 @premium_required
-def final_interview():
+async def final_interview():
 
-    user = users_collection.find_one(
-        {"_id": ObjectId(current_user.id)}
-    )
+    user = current_user_doc()
 
     interview_mode = request.values.get("mode", "resume_mixed")
     chat_history = []
@@ -945,6 +1346,9 @@ def final_interview():
             if not allowed_file(resume_file.filename):
                 return "Only PDF files are allowed."
 
+            if resume_too_large(resume_file):
+                return "Resume file is too large."
+
             filename = secure_filename(
                 f"{current_user.id}_resume.pdf"
             )
@@ -971,15 +1375,14 @@ def final_interview():
                     }
                 }
             )
+            invalidate_user_doc()
 
             resume_uploaded = True
             resume_filename = filename
 
-            # ===== CREATE VECTORSTORE =====
-            create_resume_vectorstore(
-                user_id=str(current_user.id),
-                resume_path=file_path
-            )
+            # ===== INDEX IN THE BACKGROUND =====
+            start_resume_ingestion(str(current_user.id), file_path)
+            rag_sessions.reset(str(current_user.id))
 
     # ================= HANDLE CHAT =================
     elif request.method == "POST" and request.form.get("user_message"):
@@ -989,69 +1392,93 @@ def final_interview():
 
         user_msg = request.form.get("user_message")
 
-        # Ensure vectorstore exists
-        doc_session = get_current_doc(str(current_user.id))
+        # Ensure the resume is indexed (queued for ingestion if not)
+        get_resume_retriever(str(current_user.id), resume_filename)
 
-        if not doc_session:
-            # Rebuild from stored resume
-            resume_path = os.path.join(
-                app.config["UPLOAD_FOLDER"],
-                "user_resumes",
-                resume_filename
-            )
-
-            create_resume_vectorstore(
-                user_id=str(current_user.id),
-                resume_path=resume_path
-            )
-
-        ai_reply = rag_interview_response(
+        ai_reply = await rag_interview_response(
             user_input=user_msg,
             user_id=str(current_user.id),
             mode=interview_mode
         )
 
-        doc_session = get_current_doc(str(current_user.id))
-
-        if doc_session:
-            chat_history = [
-                {
-                    "role": "ai" if isinstance(msg, AIMessage) else "user",
-                    "content": msg.content
-                }
-                for msg in doc_session["chat_history"]
-            ]
+        chat_history = rag_display_history(str(current_user.id))
 
     # ================= LOAD EXISTING CHAT =================
     else:
         if resume_uploaded:
-            doc_session = get_current_doc(str(current_user.id))
-            if doc_session:
-                chat_history = [
-                    {
-                        "role": "ai" if isinstance(msg, AIMessage) else "user",
-                        "content": msg.content
-                    }
-                    for msg in doc_session["chat_history"]
-                ]
+            chat_history = rag_display_history(str(current_user.id))
 
     return render_template(
         "final_interview.html",
         resume_uploaded=resume_uploaded,
         resume_filename=resume_filename,
         interview_mode=interview_mode,
-        chat_history=chat_history
+        chat_history=chat_history,
+        ingest_job_id=active_ingest_job_id(str(current_user.id)) if resume_uploaded else None,
+        ingest_error=resume_ingest_error(str(current_user.id)) if resume_uploaded else None
     )
 
 
+@app.route("/final-interview/ingest/<job_id>")
+@login_required
+@premium_required
+def final_interview_ingest_status(job_id):
+
+    job = ingest_jobs.get_job(job_id, str(current_user.id))
+
+    if not job:
+        return jsonify({"error": "Unknown job"}), 404
+
+    return jsonify({
+        "job_id": job["_id"],
+        "status": job["status"],
+        "created_at": job["created_at"].isoformat(),
+        "started_at": job["started_at"].isoformat() if job.get("started_at") else None,
+        "finished_at": job["finished_at"].isoformat() if job.get("finished_at") else None,
+        "timings": job.get("timings", {}),
+        "result": job.get("result"),
+        "error": job.get("error")
+    })
+
+
 
 
 
+@app.route("/final-interview/stream", methods=["POST"])
+@login_required
+@premium_required
+def final_interview_stream():
+
+    user_msg = request.form.get("user_message", "").strip()
+    if not user_msg:
+        return jsonify({"error": "Empty message"}), 400
+
+    user = current_user_doc()
+    resume_filename = user.get("profile", {}).get("resume", {}).get("filename")
+
+    if not resume_filename:
+        return jsonify({"error": "Please upload your resume first."}), 400
+
+    retriever = get_resume_retriever(str(current_user.id), resume_filename)
+    if not retriever:
+        return jsonify({"error": resume_unavailable_reply(str(current_user.id))}), 409
+
+    user_id = str(current_user.id)
+    chat_history = load_rag_history(user_id)
+    messages = build_rag_messages(user_msg, user_id, chat_history)
+    version = resume_version(user_id)
+
+    def save_turn(reply):
+        rag_sessions.append_turn(user_id, user_msg, reply, version)
+
+    return sse_reply(model_registry.get("chat_model"), messages, on_complete=save_turn)
+
+
 @app.route("/download-report")
 @login_required
 @premium_required
 def download_report():
-    user = users_collection.find_one({"_id": ObjectId(current_user.id)})
+    user = current_user_doc()
     interviews = list(
         interviews_collection.find(
             {"user_id": current_user.id}
@@ -1110,6 +1537,7 @@ def cancel_subscription():
         {"_id": ObjectId(current_user.id)},
         {"$set": {"subscription": "free"}}
     )
+    invalidate_user_doc()
     return redirect("/profile")
 
 @app.route("/submit_answer", methods=["POST"])
@@ -1127,14 +1555,16 @@ def submit_answer():
 
     score = min(fluency_score * 10, 100)
 
-    interviews_collection.insert_one({
+    interview = {
         "user_id": current_user.id,
         "question": question,
         "answer": answer,
         "corrected": corrected,
         "feedback": feedback,
         "score": score
-    })
+    }
+    interviews_collection.insert_one(interview)
+    user_stats.record(interview)
 
     return render_template(
         "result.html",
@@ -1148,20 +1578,13 @@ def submit_answer():
 @login_required
 def usage():
 
-    user_data = users_collection.find_one(
-        {"_id": ObjectId(current_user.id)}
-    )
+    user_data = current_user_doc()
 
     subscription = user_data.get("subscription", "free")
 
-    one_week_ago = datetime.utcnow() - timedelta(days=7)
-
-    weekly_sessions = interviews_collection.count_documents({
-        "user_id": current_user.id,
-        "created_at": {"$gte": one_week_ago}
-    })
+    weekly_sessions = usage_quota.used(current_user.id)
 
-    FREE_LIMIT = 20
+    FREE_LIMIT = Config.FREE_WEEKLY_LIMIT
 
     remaining = max(FREE_LIMIT - weekly_sessions, 0)
     progress_percent = min((weekly_sessions / FREE_LIMIT) * 100, 100)
@@ -1208,59 +1631,126 @@ Rules:
 """
 
 
+END_INTERVIEW_PROMPT = "The candidate has ended the interview. Provide final evaluation."
+
+
+# ---------------- Server-side interview history ----------------
+# The cookie only holds an opaque "interview_sid"; transcripts are kept
+# in services.session_store and loaded when a route needs them.
+
+def interview_session_id():
+    # Bound to the user so a shared browser never sees another user's transcript
+    sid = session.get("interview_sid")
+    if not sid or not sid.startswith(f"{current_user.id}:"):
+        sid = f"{current_user.id}:{uuid.uuid4().hex}"
+        session["interview_sid"] = sid
+    return sid
+
+
+def load_history(history_key):
+    sid = interview_session_id()
+    history = session_store.load(sid, history_key)
+
+    # Move transcripts left in old cookie sessions into the store
+    if history is None and history_key in session:
+        history = session.pop(history_key)
+        session_store.save(sid, history_key, history)
+
+    return history
+
+
+def save_history(history_key, history):
+    session_store.save(interview_session_id(), history_key, history)
+
+
+def clear_history(history_key):
+    session.pop(history_key, None)
+    session_store.delete(interview_session_id(), history_key)
+
+
+def append_turn(sid, history_key, user_message, reply):
+    # Streams save the candidate's message together with the reply, so a
+    # failed stream leaves nothing behind for the POST fallback to repeat
+    history = session_store.load(sid, history_key)
+    if history is not None:
+        history_manager.add_message(history, "human", user_message)
+        history_manager.add_message(history, "ai", reply)
+        session_store.save(sid, history_key, history)
+
+
+def sse_reply(runnable, value, on_complete=None):
+    # on_complete must not need the request context: under asgi.py it
+    # runs after the view has returned
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+    if request.environ.get(sse_bridge.ENVIRON_KEY):
+        headers[sse_bridge.HEADER] = sse_bridge.register(runnable, value, on_complete)
+        return Response("", mimetype="text/event-stream", headers=headers)
+
+    return Response(
+        stream_with_context(sse_bridge.events(llm_executor.stream(runnable, value), on_complete)),
+        mimetype="text/event-stream",
+        headers=headers
+    )
+
+
+def load_interview_history(history_key, budget):
+    # History for chat/voice, compacted to the route's token budget
+    raw_history = load_history(history_key)
+
+    if raw_history is None:
+        raw_history = history_manager.new_history(SYSTEM_PROMPT)
+        save_history(history_key, raw_history)
+        return raw_history
+
+    compacted = history_manager.compact(raw_history, budget)
+    if compacted is not raw_history:
+        save_history(history_key, compacted)
+
+    return compacted
+
+
+def interview_turn_text(user_text):
+    return END_INTERVIEW_PROMPT if user_text.lower() == "exit" else user_text
+
+
 # ---------------- Route ----------------
 @app.route("/chat-interview", methods=["GET", "POST"])
 @login_required
 @premium_required
-def chat_interview():
+async def chat_interview():
     interview_type = request.args.get("type", "hr")
     reset = request.args.get("reset", None)
 
     # ---------------- Handle Start Over ----------------
     if reset:
-        session.pop("chat_history", None)
+        clear_history("chat_history")
         return redirect(url_for("chat_interview", type=interview_type))
 
-    # ---------------- Initialize session ----------------
-    if "chat_history" not in session:
-        session["chat_history"] = [{"role": "system", "content": SYSTEM_PROMPT}]
-
-    raw_history = session["chat_history"]
-    chat_history = []
-
-    # ---------------- Convert session dicts to LangChain messages ----------------
-    for msg in raw_history:
-        if msg["role"] == "system":
-            chat_history.append(SystemMessage(content=msg["content"]))
-        elif msg["role"] == "human":
-            chat_history.append(HumanMessage(content=msg["content"]))
-        elif msg["role"] == "ai":
-            chat_history.append(AIMessage(content=msg["content"]))
+    # ---------------- Load (and compact) session history ----------------
+    raw_history = load_interview_history("chat_history", Config.CHAT_HISTORY_TOKEN_BUDGET)
 
     # ---------------- Handle user POST message ----------------
     if request.method == "POST":
         user_text = request.form.get("user_message", "").strip()
         if user_text:
-            if user_text.lower() == "exit":
-                chat_history.append(HumanMessage(content="The candidate has ended the interview. Provide final evaluation."))
-                response = llm.invoke(chat_history)
-                chat_history.append(AIMessage(content=response.content))
-            else:
-                chat_history.append(HumanMessage(content=user_text))
-                response = llm.invoke(chat_history)
-                chat_history.append(AIMessage(content=response.content))
-
-            # Save back as JSON-serializable dicts
-            session["chat_history"] = [
-                {"role": "system" if isinstance(m, SystemMessage) else "human" if isinstance(m, HumanMessage) else "ai",
-                 "content": m.content}
-                for m in chat_history
-            ]
+            history_manager.add_message(raw_history, "human", interview_turn_text(user_text))
+
+            try:
+                response = await llm_executor.ainvoke(
+                    model_registry.get("llm"), history_manager.to_messages(raw_history)
+                )
+                reply = response.content
+            except llm_executor.LLMTimeout:
+                reply = LLM_TIMEOUT_REPLY
+            history_manager.add_message(raw_history, "ai", reply)
+
+            save_history("chat_history", raw_history)
 
     # ---------------- Prepare for frontend display ----------------
     display_history = [
-        {"role": "HR-Donald" if isinstance(m, AIMessage) else "You", "content": m.content}
-        for m in chat_history if not isinstance(m, SystemMessage)
+        {"role": "HR-Donald" if m["role"] == "ai" else "You", "content": m["content"]}
+        for m in history_manager.visible_turns(raw_history)
     ]
 
     return render_template(
@@ -1270,16 +1760,32 @@ def chat_interview():
     )
 
 
+@app.route("/chat-interview/stream", methods=["POST"])
+@login_required
+@premium_required
+def chat_interview_stream():
+    user_text = request.form.get("user_message", "").strip()
+    if not user_text:
+        return jsonify({"error": "Empty message"}), 400
+
+    raw_history = load_interview_history("chat_history", Config.CHAT_HISTORY_TOKEN_BUDGET)
+    user_message = interview_turn_text(user_text)
+    history_manager.add_message(raw_history, "human", user_message)
+    sid = interview_session_id()
+
+    return sse_reply(
+        model_registry.get("llm"), history_manager.to_messages(raw_history),
+        on_complete=lambda reply: append_turn(sid, "chat_history", user_message, reply)
+    )
+
+
 # ------------------- Voice Interview Page -------------------
 @app.route("/voice-interview")
 @login_required
 @premium_required
 def voice_interview():
     # Initialize session chat history if not exists
-    if "voice_chat_history" not in session:
-        session["voice_chat_history"] = [
-            {"role": "system", "content": SYSTEM_PROMPT}
-        ]
+    load_interview_history("voice_chat_history", Config.VOICE_HISTORY_TOKEN_BUDGET)
     return render_template("voice_interview.html")
 
 
@@ -1287,50 +1793,204 @@ def voice_interview():
 @app.route("/voice-interview", methods=["POST"])
 @login_required
 @premium_required
-def voice_interview_post():
+async def voice_interview_post():
     user_text = request.json.get("user_text", "").strip()
     if not user_text:
         return jsonify({"ai_reply": "Please say something first."})
 
     # Load chat history from session
-    raw_history = session.get("voice_chat_history", [])
-    chat_history = []
+    raw_history = load_interview_history("voice_chat_history", Config.VOICE_HISTORY_TOKEN_BUDGET)
+    history_manager.add_message(raw_history, "human", interview_turn_text(user_text))
 
-    for msg in raw_history:
-        if msg["role"] == "system":
-            chat_history.append(SystemMessage(content=msg["content"]))
-        elif msg["role"] == "human":
-            chat_history.append(HumanMessage(content=msg["content"]))
-        elif msg["role"] == "ai":
-            chat_history.append(AIMessage(content=msg["content"]))
+    try:
+        response = await llm_executor.ainvoke(
+            model_registry.get("llm"), history_manager.to_messages(raw_history)
+        )
+    except llm_executor.LLMTimeout:
+        return jsonify({"ai_reply": LLM_TIMEOUT_REPLY}), 504
 
-    # Handle exit
+    # Clear session after final evaluation
     if user_text.lower() == "exit":
-        chat_history.append(HumanMessage(content="The candidate has ended the interview. Provide final evaluation."))
-        response = llm.invoke(chat_history)
-        chat_history.append(AIMessage(content=response.content))
-
-        # Clear session after final evaluation
-        session.pop("voice_chat_history", None)
+        clear_history("voice_chat_history")
         return jsonify({"ai_reply": response.content})
 
-    # Normal flow
-    chat_history.append(HumanMessage(content=user_text))
-    response = llm.invoke(chat_history)
-    chat_history.append(AIMessage(content=response.content))
-
-    # Save updated history back to session (JSON serializable)
-    session["voice_chat_history"] = [
-        {"role": "system" if isinstance(m, SystemMessage)
-                 else "human" if isinstance(m, HumanMessage)
-                 else "ai",
-         "content": m.content}
-        for m in chat_history
-    ]
+    history_manager.add_message(raw_history, "ai", response.content)
+    save_history("voice_chat_history", raw_history)
 
     return jsonify({"ai_reply": response.content})
 
 
+@app.route("/voice-interview/stream", methods=["POST"])
+@login_required
+@premium_required
+def voice_interview_stream():
+    user_text = (request.get_json(silent=True) or {}).get("user_text", "").strip()
+    if not user_text:
+        return jsonify({"ai_reply": "Please say something first."}), 400
+
+    raw_history = load_interview_history("voice_chat_history", Config.VOICE_HISTORY_TOKEN_BUDGET)
+    user_message = interview_turn_text(user_text)
+    history_manager.add_message(raw_history, "human", user_message)
+    messages = history_manager.to_messages(raw_history)
+    sid = interview_session_id()
+
+    if user_text.lower() == "exit":
+        # Final evaluation ends the interview; the transcript is cleared
+        # only once it arrived, so a failed stream can be retried
+        return sse_reply(
+            model_registry.get("llm"), messages,
+            on_complete=lambda reply: session_store.delete(sid, "voice_chat_history")
+        )
+
+    return sse_reply(
+        model_registry.get("llm"), messages,
+        on_complete=lambda reply: append_turn(sid, "voice_chat_history", user_message, reply)
+    )
+
+
+@app.route("/voice-interview/reset", methods=["POST"])
+@login_required
+def voice_interview_reset():
+    clear_history("voice_chat_history")
+    return jsonify({"status": "ok"})
+
+
+@app.route("/models/status")
+@login_required
+@admin_required
+def models_status():
+    return jsonify(model_registry.stats())
+
+
+@app.cli.command("clear-feedback-cache")
+def clear_feedback_cache_command():
+    # Drops cached feedback from older prompt versions
+    removed = feedback_cache.invalidate([PROMPT_VERSION, BATCH_PROMPT_VERSION])
+    print(f"Removed {removed} cached feedback entries (current prompt version {PROMPT_VERSION})")
+
+
+@app.route("/cache/status")
+@login_required
+@admin_required
+def cache_status():
+    return jsonify({
+        "feedback": feedback_cache.stats(),
+        "llm": llm_executor.stats(),
+        "retrievers": retriever_cache.stats(),
+        "retrieval": retrieval_cache.stats(),
+        "embeddings": embedding_service.stats()
+    })
+
+
+def open_resume_index():
+    # A local index is locked by the process that opened it first
+    try:
+        resume_index.shared_store()
+    except resume_index.ResumeIndexBusy:
+        raise click.ClickException(
+            "The resume index is open in the running server: stop the server "
+            "or set CHROMA_HOST to share the index between processes"
+        )
+
+
+@app.cli.command("migrate-resume-stores")
+@click.option("--delete", is_flag=True, help="Remove each per-user store once migrated.")
+def migrate_resume_stores_command(delete):
+    # Folds legacy resumes/chroma_store/<user_id> stores into the shared index
+    store_root = os.path.join(app.config["UPLOAD_FOLDER"], "chroma_store")
+    shared_dir = os.path.abspath(Config.RESUME_INDEX_DIR)
+
+    if not os.path.isdir(store_root):
+        print(f"{store_root} does not exist, nothing to migrate")
+        return
+
+    open_resume_index()
+
+    for name in sorted(os.listdir(store_root)):
+        store_dir = os.path.join(store_root, name)
+        if not os.path.isdir(store_dir) or os.path.abspath(store_dir) == shared_dir:
+            continue
+
+        try:
+            count = resume_index.migrate_user_store(name, store_dir)
+        except Exception as e:
+            print(f"{name}: failed ({e})")
+            continue
+
+        retriever_cache.invalidate(name)
+        print(f"{name}: {count} chunks migrated")
+
+        if delete:
+            shutil.rmtree(store_dir)
+
+    resume_index.persist()
+
+
+@app.cli.command("resume-store-maintenance")
+@click.option("--delete", is_flag=True, help="Apply the actions instead of only reporting them.")
+@click.option("--vacuum", is_flag=True, help="Vacuum the index's SQLite file.")
+@click.option("--rebuild-into", default=None, help="Copy the index into a fresh store at this path.")
+def resume_store_maintenance_command(delete, vacuum, rebuild_into):
+    open_resume_index()
+    report = store_maintenance.run(delete=delete, vacuum=vacuum)
+
+    for action in report.pop("actions"):
+        print(("" if delete else "[dry run] ") + action)
+
+    print(json.dumps(report, indent=2, default=str))
+
+    if rebuild_into:
+        count = store_maintenance.rebuild_into(rebuild_into)
+        print(f"{count} chunks copied to {rebuild_into}; point RESUME_INDEX_DIR at it")
+
+
+@app.cli.command("ensure-indexes")
+def ensure_indexes_command():
+    results = db_indexes.ensure(db)
+
+    for label, status in results.items():
+        print(f"{label}: {status}")
+
+    if any(status.startswith("error") for status in results.values()):
+        raise SystemExit(1)
+
+
+@app.cli.command("check-indexes")
+def check_indexes_command():
+    problems = db_indexes.check(db)
+
+    for problem in problems:
+        print(problem)
+
+    if problems:
+        raise SystemExit(1)
+
+    print("All indexes present")
+
+
+@app.cli.command("rebuild-user-stats")
+@click.argument("user_id", required=False)
+def rebuild_user_stats_command(user_id):
+    # Recomputes dashboard stats from interview history (one user or all)
+    if user_id:
+        stats = user_stats.rebuild(user_id)
+        print(f"{user_id}: {stats['count']} interviews")
+    else:
+        print(f"Rebuilt stats for {user_stats.rebuild_all()} users")
+
+
+@app.cli.command("rebuild-usage-counters")
+def rebuild_usage_counters_command():
+    # Backfills the daily usage buckets for the current window from history
+    print(f"Rebuilt usage counters for {usage_quota.rebuild(interviews_collection)} users")
+
+
+@app.cli.command("preload-models")
+def preload_models_command():
+    model_registry.preload()
+    print(json.dumps(model_registry.stats(), indent=2))
+
+
 @app.route("/upgrade")
 @login_required
 def upgrade():
@@ -1339,14 +1999,33 @@ def upgrade():
         {"_id": ObjectId(current_user.id)},
         {"$set": {"subscription": "premium"}}
     )
+    invalidate_user_doc()
 
     return redirect("/usage")
 
 
 @app.route("/logout")
 def logout():
+    session.pop("interview_sid", None)
     logout_user()
     return redirect("/")
 
+# =================== Serve Hook ===================
+# Background workers and the one-off index check belong to the process
+# that serves requests, so they run here and not when app.py is imported
+# (CLI commands, the reloader's watcher process and transcription pool
+# children import it too). Called by wsgi.py, asgi.py and `python app.py`.
+
+def start_background_services():
+    if Config.ENSURE_INDEXES_ON_STARTUP:
+        db_indexes.ensure(db)
+
+    ingest_jobs.start()
+    store_maintenance.start()
+
+
 if __name__ == "__main__":
+    # With the reloader, only the child process serves requests
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_background_services()
     app.run(debug=True, host="0.0.0.0")
@@ -0,0 +1,43 @@
+from asgiref.sync import ThreadSensitiveContext
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app, start_background_services
+from services import sse_bridge
+
+
+# =================== ASGI Entry Point ===================
+# Serve with an ASGI server, e.g.
+#
+#   uvicorn asgi:asgi_app --workers 2
+#
+# Flask itself stays WSGI. WsgiToAsgi runs the app through asgiref's
+# thread-sensitive sync_to_async, which without a ThreadSensitiveContext
+# puts every request of the process on one shared thread. Each request
+# therefore gets its own context (as Django's ASGIHandler does), i.e. its
+# own thread for the duration of the view. The `async def` views await
+# services.llm_executor inside that thread, as they do under app:app.
+#
+# The streaming LLM endpoints hold no thread while tokens arrive: the
+# view only registers the job and returns, and DeferredStreamMiddleware
+# streams it on the server's event loop with llm_executor.astream().
+
+
+def _deferred_streams(environ, start_response):
+    # Tells sse_reply() that the middleware below will do the streaming
+    environ[sse_bridge.ENVIRON_KEY] = True
+    return app(environ, start_response)
+
+
+class ThreadPerRequest:
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        async with ThreadSensitiveContext():
+            await self.app(scope, receive, send)
+
+
+asgi_app = sse_bridge.DeferredStreamMiddleware(ThreadPerRequest(WsgiToAsgi(_deferred_streams)))
+
+start_background_services()
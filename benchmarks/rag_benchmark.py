@@ -0,0 +1,327 @@
+import argparse
+import glob
+import hashlib
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_community.vectorstores import Chroma
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.fake import FakeListLLM
+from langchain_core.messages import SystemMessage, HumanMessage
+
+from services import embedding_service
+from services import model_registry
+from services import resume_index
+
+
+# =================== Resume RAG Benchmark ===================
+# Runs fully offline against a folder of resume PDFs. Each configuration
+# ingests the corpus through resume_index.ingest_resume() and the batched
+# embedding service, exactly as uploads are, and reports its parse /
+# split / embed timings. Queries are sentences sampled from the resumes
+# themselves (parsed once up front, untimed). A query counts as recalled
+# when the top-k chunks together contain at least RECALL_MIN_OVERLAP of
+# its words, so a sentence split across a chunk boundary can still be
+# found. exact_recall_at_k (whole sentence inside one chunk) is reported
+# too, but it is biased against small chunk sizes. The interviewer LLM
+# is a deterministic fake, so turn latency measures only our side.
+#
+#   python benchmarks/rag_benchmark.py --corpus resumes/user_resumes \
+#       --out bench_results.json
+#
+# --embedding hash (the default) needs no model; --embedding bge uses
+# the cached BGE model and fails instead of downloading it.
+#
+# Results are written as JSON so runs can be diffed between releases.
+
+
+RECALL_MIN_OVERLAP = 0.8
+
+
+def words(text):
+    return set(re.findall(r"\w+", text.lower()))
+
+
+class HashEmbeddings(Embeddings):
+    # Deterministic bag-of-words hashing; use when the BGE model is not cached
+
+    def __init__(self, size=384):
+        self.size = size
+
+    def _embed(self, text):
+        vector = [0.0] * self.size
+        for word in re.findall(r"\w+", text.lower()):
+            index = int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % self.size
+            vector[index] += 1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def load_embeddings(name):
+    if name == "hash":
+        return HashEmbeddings()
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+    try:
+        return HuggingFaceEmbeddings(
+            model_name="BAAI/bge-small-en",
+            model_kwargs={'device': 'cpu', 'local_files_only': True},
+            encode_kwargs={'normalize_embeddings': False}
+        )
+    except Exception as e:
+        sys.exit(
+            f"BGE model is not cached ({e}). Run the app once to download it, "
+            "or use --embedding hash."
+        )
+
+
+def load_corpus(corpus_dir):
+    # Parsed here only to sample queries; ingestion parses again, timed
+    paths = sorted(
+        glob.glob(os.path.join(corpus_dir, "**", "*.pdf"), recursive=True)
+        + glob.glob(os.path.join(corpus_dir, "**", "*.txt"), recursive=True)
+    )
+    corpus = []
+    for path in paths:
+        try:
+            corpus.append((path, resume_index.load_resume_document(path)))
+        except Exception as e:
+            print(f"Skipping {path}: {e}")
+    return corpus
+
+
+def make_queries(corpus, per_resume, seed):
+    # Sentences of 6+ words, sampled deterministically per resume
+    rng = random.Random(seed)
+    queries = []
+
+    for resume_id, (_, pages) in enumerate(corpus):
+        text = " ".join(page.page_content for page in pages)
+        sentences = [
+            re.sub(r"\s+", " ", s).strip()
+            for s in re.split(r"[.\n•]", text)
+        ]
+        sentences = [s for s in sentences if len(s.split()) >= 6]
+        rng.shuffle(sentences)
+
+        for sentence in sentences[:per_resume]:
+            queries.append({"resume_id": str(resume_id), "text": sentence})
+
+    return queries
+
+
+def dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run_config(corpus, queries, settings):
+    persist_dir = tempfile.mkdtemp(prefix="rag_bench_")
+
+    try:
+        metadata = {"hnsw:space": settings["space"]}
+        for key in ("M", "construction_ef", "search_ef"):
+            if settings.get(key):
+                metadata[f"hnsw:{key}"] = settings[key]
+
+        store = Chroma(
+            collection_name="bench",
+            persist_directory=persist_dir,
+            embedding_function=embedding_service.BatchedEmbeddings(),
+            collection_metadata=metadata
+        )
+
+        # ---------------- Ingestion ----------------
+        pages = 0
+        chunks = 0
+        timings = {}
+        ingest_started = time.perf_counter()
+
+        for resume_id, (path, _) in enumerate(corpus):
+            result = resume_index.ingest_resume(
+                str(resume_id), path, timings, vectorstore=store,
+                chunk_size=settings["chunk_size"], chunk_overlap=settings["chunk_overlap"]
+            )
+            pages += result["pages"]
+            chunks += result["added"]
+
+        ingest_seconds = time.perf_counter() - ingest_started
+        embed_seconds = timings.get("embed", 0)
+
+        # ---------------- Queries ----------------
+        llm = FakeListLLM(responses=["Thanks. Can you tell me more about that project?"])
+        latencies = []
+        turn_latencies = []
+        hits = 0
+        exact_hits = 0
+
+        for query in queries:
+            started = time.perf_counter()
+            docs = store.similarity_search(
+                query["text"], k=settings["k"], filter={"user_id": query["resume_id"]}
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+
+            needle = query["text"].lower()
+            if any(needle in re.sub(r"\s+", " ", d.page_content).lower() for d in docs):
+                exact_hits += 1
+
+            query_words = words(query["text"])
+            found = set().union(*(words(d.page_content) for d in docs)) & query_words
+            if query_words and len(found) / len(query_words) >= RECALL_MIN_OVERLAP:
+                hits += 1
+
+            # Same prompt assembly as the interview route, with the fake LLM
+            context = "\n\n".join(d.page_content for d in docs)
+            llm.invoke([
+                SystemMessage(content=f"You are a professional AI interviewer.\n\nContext:\n{context}"),
+                HumanMessage(content=query["text"])
+            ])
+            turn_latencies.append((time.perf_counter() - started) * 1000)
+
+        return {
+            "settings": settings,
+            "resumes": len(corpus),
+            "pages": pages,
+            "chunks": chunks,
+            "queries": len(queries),
+            "ingest_ms_per_page": round(ingest_seconds * 1000 / pages, 2) if pages else None,
+            "parse_ms_per_page": round(timings.get("parse", 0) * 1000 / pages, 2) if pages else None,
+            "split_ms_per_page": round(timings.get("split", 0) * 1000 / pages, 2) if pages else None,
+            "embed_chunks_per_sec": round(chunks / embed_seconds, 1) if embed_seconds else None,
+            "query_p50_ms": round(percentile(latencies, 50), 2) if latencies else None,
+            "query_p99_ms": round(percentile(latencies, 99), 2) if latencies else None,
+            "turn_p50_ms": round(percentile(turn_latencies, 50), 2) if turn_latencies else None,
+            "recall_at_k": round(hits / len(queries), 4) if queries else None,
+            "exact_recall_at_k": round(exact_hits / len(queries), 4) if queries else None,
+            "disk_bytes": dir_size(persist_dir)
+        }
+
+    finally:
+        shutil.rmtree(persist_dir, ignore_errors=True)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def int_list(value):
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline resume RAG benchmark")
+    parser.add_argument("--corpus", default=os.path.join("resumes", "user_resumes"))
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--embedding", choices=["bge", "hash"], default="hash")
+    parser.add_argument("--chunk-sizes", type=int_list, default=[500, 1000, 1500])
+    parser.add_argument("--overlaps", type=int_list, default=[50, 100, 200])
+    parser.add_argument("--k", type=int_list, default=[3, 5])
+    parser.add_argument("--hnsw-m", type=int_list, default=[16])
+    parser.add_argument("--hnsw-construction-ef", type=int_list, default=[100])
+    parser.add_argument("--hnsw-search-ef", type=int_list, default=[10, 50])
+    parser.add_argument("--space", default="l2")
+    parser.add_argument("--queries-per-resume", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        print(f"No resumes found under {args.corpus}")
+        sys.exit(1)
+
+    queries = make_queries(corpus, args.queries_per_resume, args.seed)
+    embeddings = load_embeddings(args.embedding)
+    model_registry.register("embedding", lambda: embeddings)
+
+    results = []
+    matrix = itertools.product(
+        args.chunk_sizes, args.overlaps, args.k,
+        args.hnsw_m, args.hnsw_construction_ef, args.hnsw_search_ef
+    )
+
+    for chunk_size, overlap, k, m, construction_ef, search_ef in matrix:
+        if overlap >= chunk_size:
+            continue
+
+        settings = {
+            "chunk_size": chunk_size,
+            "chunk_overlap": overlap,
+            "k": k,
+            "space": args.space,
+            "M": m,
+            "construction_ef": construction_ef,
+            "search_ef": search_ef
+        }
+        result = run_config(corpus, queries, settings)
+        results.append(result)
+
+        print(
+            f"chunk={chunk_size:<5} overlap={overlap:<4} k={k:<2} M={m:<3} "
+            f"ef_c={construction_ef:<4} ef_s={search_ef:<4} "
+            f"recall@k={result['recall_at_k']}  p50={result['query_p50_ms']}ms  "
+            f"p99={result['query_p99_ms']}ms  {result['embed_chunks_per_sec']} chunks/s  "
+            f"{result['disk_bytes'] // 1024} KB"
+        )
+
+    p50s = [r["query_p50_ms"] for r in results if r["query_p50_ms"] is not None]
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "embedding": args.embedding,
+        "corpus": args.corpus,
+        "seed": args.seed,
+        "results": results,
+        "best_recall": max(results, key=lambda r: (r["recall_at_k"] or 0,
+                                                   -(r["query_p50_ms"] or 0)))["settings"]
+        if results else None,
+        "recall_min_overlap": RECALL_MIN_OVERLAP,
+        "median_query_p50_ms": statistics.median(p50s) if p50s else None
+    }
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Wrote {len(results)} results to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -18,3 +18,129 @@ class Config:
     MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER")
 
     SECURITY_PASSWORD_SALT = os.getenv("SECURITY_PASSWORD_SALT")
+
+    # Comma separated emails allowed to see the /models and /cache status pages
+    ADMIN_EMAILS = {
+        email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()
+    }
+
+    # Comma separated model names to load at startup, e.g. "whisper,embedding"
+    PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "")
+
+    # Whisper transcription pool (0 workers = transcribe inline)
+    WHISPER_MODEL = os.getenv("WHISPER_MODEL", "tiny")
+    TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", "2"))
+    TRANSCRIBE_QUEUE_SIZE = int(os.getenv("TRANSCRIBE_QUEUE_SIZE", "8"))
+    TRANSCRIBE_TIMEOUT = int(os.getenv("TRANSCRIBE_TIMEOUT", "120"))
+    TRANSCRIBE_RETRY_AFTER = int(os.getenv("TRANSCRIBE_RETRY_AFTER", "5"))
+
+    # Chunked (streaming) transcription
+    TRANSCRIBE_STREAM_TTL = int(os.getenv("TRANSCRIBE_STREAM_TTL", "600"))
+    TRANSCRIBE_STREAM_MAX_PENDING = int(os.getenv("TRANSCRIBE_STREAM_MAX_PENDING", "6"))
+
+    # Feedback cache (in-process LRU in front of MongoDB)
+    FEEDBACK_CACHE_SIZE = int(os.getenv("FEEDBACK_CACHE_SIZE", "1024"))
+    FEEDBACK_CACHE_TTL = int(os.getenv("FEEDBACK_CACHE_TTL", "3600"))
+    FEEDBACK_CACHE_MONGO_TTL = int(os.getenv("FEEDBACK_CACHE_MONGO_TTL", str(30 * 24 * 3600)))
+
+    # Batch evaluation
+    BATCH_MAX_ITEMS_PER_CALL = int(os.getenv("BATCH_MAX_ITEMS_PER_CALL", "8"))
+    BATCH_INPUT_TOKEN_BUDGET = int(os.getenv("BATCH_INPUT_TOKEN_BUDGET", "4000"))
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+    BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "50"))
+
+    # Shared async LLM execution layer
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+    LLM_TIMEOUT = int(os.getenv("LLM_TIMEOUT", "45"))
+    LLM_BATCH_TIMEOUT = int(os.getenv("LLM_BATCH_TIMEOUT", "90"))
+
+    # Pre-generated quiz question pool
+    QUIZ_POOL_LOW_WATERMARK = int(os.getenv("QUIZ_POOL_LOW_WATERMARK", "40"))
+    QUIZ_POOL_TARGET = int(os.getenv("QUIZ_POOL_TARGET", "100"))
+    QUIZ_POOL_MAX_REFILL_CALLS = int(os.getenv("QUIZ_POOL_MAX_REFILL_CALLS", "10"))
+    QUIZ_GENERATION_TIMEOUT = int(os.getenv("QUIZ_GENERATION_TIMEOUT", "60"))
+
+    # Interview history compaction (token budgets per route)
+    CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "2500"))
+    VOICE_HISTORY_TOKEN_BUDGET = int(os.getenv("VOICE_HISTORY_TOKEN_BUDGET", "1500"))
+    HISTORY_KEEP_LAST_TURNS = int(os.getenv("HISTORY_KEEP_LAST_TURNS", "4"))
+    HISTORY_SUMMARY_MAX_TOKENS = int(os.getenv("HISTORY_SUMMARY_MAX_TOKENS", "400"))
+    HISTORY_MAX_MESSAGE_TOKENS = int(os.getenv("HISTORY_MAX_MESSAGE_TOKENS", "600"))
+    # Compaction shrinks the history to this fraction of the budget, so
+    # the summarizer runs every few turns instead of on every turn
+    HISTORY_COMPACT_TARGET = float(os.getenv("HISTORY_COMPACT_TARGET", "0.6"))
+    HISTORY_SUMMARY_TIMEOUT = int(os.getenv("HISTORY_SUMMARY_TIMEOUT", "20"))
+
+    # Free tier quota: interviews per rolling window of UTC days
+    FREE_WEEKLY_LIMIT = int(os.getenv("FREE_WEEKLY_LIMIT", "20"))
+    USAGE_WINDOW_DAYS = int(os.getenv("USAGE_WINDOW_DAYS", "7"))
+
+    # Dashboard stats: interview summaries kept per user
+    STATS_RECENT_LIMIT = int(os.getenv("STATS_RECENT_LIMIT", "20"))
+
+    # Interview history pagination
+    HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "20"))
+    HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "100"))
+
+    # Create/refresh MongoDB indexes once when the server starts, not on
+    # import (see services/db_indexes and `flask ensure-indexes`)
+    ENSURE_INDEXES_ON_STARTUP = os.getenv("ENSURE_INDEXES_ON_STARTUP", "true").lower() == "true"
+
+    # Server-side interview session store: "memory" (single worker) or "mongo"
+    SESSION_STORE = os.getenv("SESSION_STORE", "memory")
+    SESSION_STORE_TTL = int(os.getenv("SESSION_STORE_TTL", str(24 * 3600)))
+    SESSION_STORE_MAX_ENTRIES = int(os.getenv("SESSION_STORE_MAX_ENTRIES", "5000"))
+
+    # Resume interview conversations (always in MongoDB)
+    RAG_SESSION_TTL = int(os.getenv("RAG_SESSION_TTL", str(7 * 24 * 3600)))
+    RAG_HISTORY_TOKEN_BUDGET = int(os.getenv("RAG_HISTORY_TOKEN_BUDGET", "2000"))
+    # Hard cap on stored messages, a backstop behind compaction
+    RAG_HISTORY_MAX_MESSAGES = int(os.getenv("RAG_HISTORY_MAX_MESSAGES", "100"))
+
+    # Resume retriever cache (open Chroma stores per worker)
+    RETRIEVER_CACHE_SIZE = int(os.getenv("RETRIEVER_CACHE_SIZE", "32"))
+    RETRIEVER_CACHE_IDLE_SECONDS = int(os.getenv("RETRIEVER_CACHE_IDLE_SECONDS", "1800"))
+    RESUME_RETRIEVER_K = int(os.getenv("RESUME_RETRIEVER_K", "3"))
+    RETRIEVER_VERSION_CHECK_SECONDS = int(os.getenv("RETRIEVER_VERSION_CHECK_SECONDS", "30"))
+
+    # Shared multi-tenant resume vector index
+    RESUME_INDEX_DIR = os.getenv("RESUME_INDEX_DIR", os.path.join("resumes", "chroma_store", "shared"))
+    # Chroma server for the index; required when more than one process
+    # serves the app. Empty keeps the local store, locked to one process.
+    CHROMA_HOST = os.getenv("CHROMA_HOST", "")
+    CHROMA_PORT = int(os.getenv("CHROMA_PORT", "8000"))
+
+    # Batched embedding service
+    EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "64"))
+    EMBED_MAX_WAIT_MS = int(os.getenv("EMBED_MAX_WAIT_MS", "20"))
+    EMBED_TIMEOUT = int(os.getenv("EMBED_TIMEOUT", "120"))
+
+    # Background resume ingestion jobs
+    INGEST_JOB_WORKERS = int(os.getenv("INGEST_JOB_WORKERS", "1"))
+    INGEST_JOB_POLL_SECONDS = int(os.getenv("INGEST_JOB_POLL_SECONDS", "5"))
+    INGEST_JOB_STALE_SECONDS = int(os.getenv("INGEST_JOB_STALE_SECONDS", "600"))
+    INGEST_JOB_MAX_ATTEMPTS = int(os.getenv("INGEST_JOB_MAX_ATTEMPTS", "3"))
+
+    # Resume parsing limits (streamed page by page)
+    RESUME_MAX_BYTES = int(os.getenv("RESUME_MAX_BYTES", str(5 * 1024 * 1024)))
+    # Any request body (audio uploads included); Flask answers 413 above it
+    MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", str(25 * 1024 * 1024)))
+    RESUME_MAX_PAGES = int(os.getenv("RESUME_MAX_PAGES", "20"))
+    RESUME_PARSE_TIMEOUT = int(os.getenv("RESUME_PARSE_TIMEOUT", "30"))
+    RESUME_INGEST_BATCH = int(os.getenv("RESUME_INGEST_BATCH", "64"))
+
+    # Retrieval result cache for resume interviews
+    RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "2048"))
+    RETRIEVAL_CACHE_TTL = int(os.getenv("RETRIEVAL_CACHE_TTL", "1800"))
+    RETRIEVAL_MIN_QUERY_WORDS = int(os.getenv("RETRIEVAL_MIN_QUERY_WORDS", "3"))
+
+    # Resume store maintenance (orphan cleanup, vacuum, disk quotas).
+    # The scheduled run only reports unless STORE_MAINTENANCE_DELETE=true.
+    STORE_MAINTENANCE_INTERVAL = int(os.getenv("STORE_MAINTENANCE_INTERVAL", str(24 * 3600)))
+    STORE_MAINTENANCE_DELETE = os.getenv("STORE_MAINTENANCE_DELETE", "false").lower() == "true"
+    STORE_MAINTENANCE_GRACE_SECONDS = int(os.getenv("STORE_MAINTENANCE_GRACE_SECONDS", "3600"))
+    STORE_MAINTENANCE_VACUUM_RATIO = float(os.getenv("STORE_MAINTENANCE_VACUUM_RATIO", "0.2"))
+    RESUME_USER_QUOTA_BYTES = int(os.getenv("RESUME_USER_QUOTA_BYTES", str(20 * 1024 * 1024)))
+    # Live chunks in the shared vector index (0 = no limit). Counted in
+    # chunks because the index directory doesn't shrink on delete.
+    RESUME_INDEX_QUOTA_CHUNKS = int(os.getenv("RESUME_INDEX_QUOTA_CHUNKS", "0"))
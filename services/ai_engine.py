@@ -7,6 +7,12 @@ from pydantic import BaseModel, Field
 from langchain_groq import ChatGroq
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
+from services import model_registry
+from services import feedback_cache
+from services import llm_executor
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+import hashlib
 import json
 import re
 
@@ -38,21 +44,37 @@ parser = JsonOutputParser(pydantic_object=FeedbackSchema)
 
 
 
-model = ChatGroq(
-    model="llama-3.1-8b-instant",
-    temperature=0.2,
-    max_tokens=500,
-    max_retries=2
-)
+FEEDBACK_MODEL_NAME = "llama-3.1-8b-instant"
 
+# Rough output cost of one evaluation, used to pack batch requests
+BATCH_MAX_OUTPUT_TOKENS = 4000
+TOKENS_PER_RESULT = 450
 
 
-def generate_feedback(answer: str, interview_type="hr", advanced=False):
+def _load_feedback_model():
+    return ChatGroq(
+        model=FEEDBACK_MODEL_NAME,
+        temperature=0.2,
+        max_tokens=500,
+        max_retries=2
+    )
+
+
+def _load_feedback_batch_model():
+    return ChatGroq(
+        model=FEEDBACK_MODEL_NAME,
+        temperature=0.2,
+        max_tokens=BATCH_MAX_OUTPUT_TOKENS,
+        max_retries=2
+    )
 
-    format_instructions = parser.get_format_instructions()
 
-    if advanced:
-        template = """
+model_registry.register("feedback_llm", _load_feedback_model)
+model_registry.register("feedback_batch_llm", _load_feedback_batch_model)
+
+
+
+ADVANCED_TEMPLATE = """
 You are an expert interview evaluator.
 
 Evaluate the answer professionally.
@@ -64,8 +86,8 @@ Return structured JSON.
 Answer:
 {answer}
 """
-    else:
-        template = """
+
+HR_TEMPLATE = """
 Evaluate this HR interview answer professionally.
 
 Return structured JSON.
@@ -76,25 +98,260 @@ Answer:
 {answer}
 """
 
+# Bump PROMPT_REVISION for behaviour changes that don't touch the template
+# text; template edits change PROMPT_VERSION on their own.
+PROMPT_REVISION = "1"
+PROMPT_VERSION = PROMPT_REVISION + "-" + hashlib.sha256(
+    (ADVANCED_TEMPLATE + HR_TEMPLATE).encode("utf-8")
+).hexdigest()[:12]
+
+
+def fallback_feedback(advanced=False):
+    return FeedbackSchema(
+        grammar_score=5,
+        confidence_score=5,
+        technical_depth_score=5 if advanced else None,
+        improved_answer="Could not generate improved answer."
+    ).dict()
+
+
+def _feedback_chain(advanced=False):
+
+    format_instructions = parser.get_format_instructions()
+
+    template = ADVANCED_TEMPLATE if advanced else HR_TEMPLATE
+
     prompt = PromptTemplate(
         template=template,
         input_variables=["answer"],
         partial_variables={"format_instructions": format_instructions},
     )
 
-    chain = prompt | model | parser
+    return prompt | model_registry.get("feedback_llm") | parser
+
+
+def _check_result(result):
+    if not isinstance(result, dict):
+        raise ValueError("LLM did not return a JSON object")
+    return result
+
+
+def _evaluate_single(answer, advanced=False):
+    return _check_result(
+        llm_executor.invoke(_feedback_chain(advanced), {"answer": answer})
+    )
+
+
+def generate_feedback(answer: str, interview_type="hr", advanced=False):
+
+    cache_key = feedback_cache.make_key(
+        answer, interview_type, advanced, PROMPT_VERSION, FEEDBACK_MODEL_NAME
+    )
+    cached = feedback_cache.get(cache_key)
+    if cached:
+        return cached
 
     try:
-        result = chain.invoke({"answer": answer})
+        result = _evaluate_single(answer, advanced)
+        feedback_cache.put(cache_key, result, PROMPT_VERSION, FEEDBACK_MODEL_NAME)
         return result
 
     except Exception as e:
         print("LLM ERROR:", e)
 
+        return fallback_feedback(advanced)
+
+
+async def agenerate_feedback(answer: str, interview_type="hr", advanced=False):
+    # Same as generate_feedback, for async views
+
+    cache_key = feedback_cache.make_key(
+        answer, interview_type, advanced, PROMPT_VERSION, FEEDBACK_MODEL_NAME
+    )
+    cached = feedback_cache.get(cache_key)
+    if cached:
+        return cached
+
+    try:
+        result = _check_result(
+            await llm_executor.ainvoke(_feedback_chain(advanced), {"answer": answer})
+        )
+        feedback_cache.put(cache_key, result, PROMPT_VERSION, FEEDBACK_MODEL_NAME)
+        return result
+
+    except Exception as e:
+        print("LLM ERROR:", e)
+
+        return fallback_feedback(advanced)
+
+
+# =================== Batch Evaluation ===================
+
+BATCH_TEMPLATE = """
+You are an expert interview evaluator.
+
+Evaluate each answer below professionally and independently.
+
+Return ONLY a JSON object of the form:
+{{"results": [{{"id": <id>, "grammar_score": 0-10, "confidence_score": 0-10,
+"technical_depth_score": 0-10 or null, "improved_answer": "..."}}]}}
+
+Include exactly one result for every id.
+{technical_rule}
+
+Answers:
+{answers}
+"""
+
+BATCH_PROMPT_VERSION = PROMPT_VERSION + "-batch-" + hashlib.sha256(
+    BATCH_TEMPLATE.encode("utf-8")
+).hexdigest()[:8]
+
+
+def _estimate_tokens(text):
+    return len(text or "") // 4 + 1
+
+
+def _pack_items(pending):
+    # Greedy packing: input and expected output must both fit the budget
+    packs = []
+    current = []
+    input_tokens = 0
+
+    for index, item in pending:
+        tokens = _estimate_tokens(item.get("question")) + _estimate_tokens(item["answer"])
+        too_big = (
+            input_tokens + tokens > Config.BATCH_INPUT_TOKEN_BUDGET
+            or (len(current) + 1) * TOKENS_PER_RESULT > BATCH_MAX_OUTPUT_TOKENS
+            or len(current) >= Config.BATCH_MAX_ITEMS_PER_CALL
+        )
+        if current and too_big:
+            packs.append(current)
+            current = []
+            input_tokens = 0
+
+        current.append((index, item))
+        input_tokens += tokens
+
+    if current:
+        packs.append(current)
+
+    return packs
+
+
+def _evaluate_pack(pack, advanced):
+    if len(pack) == 1:
+        index, item = pack[0]
+        return {index: _evaluate_single(item["answer"], advanced)}
+
+    answers = "\n\n".join(
+        f"[id={index}]\nQuestion: {item.get('question', '')}\nAnswer: {item['answer']}"
+        for index, item in pack
+    )
+    technical_rule = (
+        "Set technical_depth_score for every answer."
+        if advanced else "Set technical_depth_score to null."
+    )
+
+    response = llm_executor.invoke(
+        model_registry.get("feedback_batch_llm"),
+        BATCH_TEMPLATE.format(answers=answers, technical_rule=technical_rule),
+        timeout=Config.LLM_BATCH_TIMEOUT
+    )
+    data = extract_json(response.content) or {}
+
+    results = {}
+    expected = {index for index, _ in pack}
+
+    for entry in data.get("results", []):
+        try:
+            entry_id = int(entry.get("id"))
+            feedback = FeedbackSchema(**entry).dict()
+        except Exception:
+            continue
+        if entry_id in expected:
+            results[entry_id] = feedback
+
+    return results
+
+
+def _run_pack(pack, advanced):
+    try:
+        results = _evaluate_pack(pack, advanced)
+    except Exception as e:
+        print("Batch LLM ERROR:", e)
+        results = {}
+
+    outcome = {}
+
+    # Anything the packed call dropped or garbled is retried on its own,
+    # so one bad answer never fails the whole pack.
+    for index, item in pack:
+        if index in results:
+            outcome[index] = (results[index], None)
+            continue
+        try:
+            outcome[index] = (_evaluate_single(item["answer"], advanced), None)
+        except Exception as e:
+            print("LLM ERROR:", e)
+            outcome[index] = (None, str(e) or e.__class__.__name__)
+
+    return outcome
+
+
+def generate_feedback_batch(items, advanced=False):
+    # items: [{"question": ..., "answer": ..., "interview_type": ...}]
+    # returns one {"feedback": ..., "error": ..., "cached": ...} per item, in order
+
+    results = [None] * len(items)
+    keys = {}
+    pending = []
+
+    for index, item in enumerate(items):
+        answer = item.get("answer") or ""
+        interview_type = item.get("interview_type") or "hr"
+
+        if not isinstance(answer, str) or not isinstance(interview_type, str) \
+                or not isinstance(item.get("question") or "", str):
+            results[index] = {
+                "feedback": None,
+                "error": "answer, question and interview_type must be strings",
+                "cached": False
+            }
+            continue
+
+        if not answer.strip():
+            results[index] = {"feedback": None, "error": "Empty answer", "cached": False}
+            continue
+
+        single_key = feedback_cache.make_key(
+            answer, interview_type, advanced, PROMPT_VERSION, FEEDBACK_MODEL_NAME
+        )
+        batch_key = feedback_cache.make_key(
+            answer, interview_type, advanced, BATCH_PROMPT_VERSION, FEEDBACK_MODEL_NAME
+        )
+
+        cached = feedback_cache.get(single_key) or feedback_cache.get(batch_key)
+        if cached:
+            results[index] = {"feedback": cached, "error": None, "cached": True}
+            continue
+
+        keys[index] = batch_key
+        pending.append((index, {**item, "answer": answer, "interview_type": interview_type}))
+
+    packs = _pack_items(pending)
+
+    if packs:
+        workers = min(Config.BATCH_CONCURRENCY, len(packs))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            outcomes = executor.map(lambda pack: _run_pack(pack, advanced), packs)
+
+            for outcome in outcomes:
+                for index, (feedback, error) in outcome.items():
+                    if feedback:
+                        feedback_cache.put(
+                            keys[index], feedback, BATCH_PROMPT_VERSION, FEEDBACK_MODEL_NAME
+                        )
+                    results[index] = {"feedback": feedback, "error": error, "cached": False}
 
-        return FeedbackSchema(
-            grammar_score=5,
-            confidence_score=5,
-            technical_depth_score=5 if advanced else None,
-            improved_answer="Could not generate improved answer."
-        ).dict()
\ No newline at end of file
+    return results
@@ -0,0 +1,163 @@
+from pymongo.errors import OperationFailure, PyMongoError
+
+from config import Config
+
+
+# =================== MongoDB Indexes ===================
+# Every index the app relies on is declared here and created by
+# `flask ensure-indexes` or once when the server starts (create_index is
+# a no-op when the index already exists). A TTL that
+# changed in Config is applied with collMod, and indexes listed in
+# retired() are dropped. check() lists what is missing, different or
+# retired so a deploy can be verified without changing it.
+
+def declared():
+    # collection -> [(keys, options)]
+    indexes = {
+        "users": [
+            ([("email", 1)], {"unique": True})
+        ],
+        "interviews": [
+            # Serves history pages (keyset on created_at, _id) and date ranges
+            ([("user_id", 1), ("created_at", -1), ("_id", -1)], {})
+        ],
+        "feedback_cache": [
+            ([("created_at", 1)], {"expireAfterSeconds": Config.FEEDBACK_CACHE_MONGO_TTL}),
+            ([("prompt_version", 1)], {})
+        ],
+        "quiz_questions": [
+            ([("language", 1), ("difficulty", 1), ("hash", 1)], {"unique": True})
+        ],
+        "rag_interviews": [
+            ([("updated_at", 1)], {"expireAfterSeconds": Config.RAG_SESSION_TTL})
+        ],
+        "usage_counters": [
+            ([("expires_at", 1)], {"expireAfterSeconds": 0})
+        ],
+        "ingest_jobs": [
+            ([("status", 1), ("created_at", 1)], {}),
+            ([("user_id", 1), ("created_at", -1)], {})
+        ]
+    }
+
+    if Config.SESSION_STORE == "mongo":
+        indexes["interview_sessions"] = [
+            ([("updated_at", 1)], {"expireAfterSeconds": Config.SESSION_STORE_TTL})
+        ]
+
+    return indexes
+
+
+def retired():
+    # collection -> [keys] of indexes superseded by a declared one
+    return {
+        "interviews": [
+            # Prefix of (user_id, created_at, _id), which serves the same queries
+            [("user_id", 1), ("created_at", -1)]
+        ]
+    }
+
+
+def _label(collection_name, keys):
+    return f"{collection_name}." + "_".join(f"{f}_{d}" for f, d in keys)
+
+
+def _key(spec):
+    return [
+        (field, direction if isinstance(direction, str) else int(direction))
+        for field, direction in spec
+    ]
+
+
+def _find(collection, keys):
+    for name, info in collection.index_information().items():
+        if _key(info["key"]) == keys:
+            return name, info
+    return None, None
+
+
+def ensure(db):
+    # Returns {"collection.index": "created/ok/updated/error: ..."}
+    results = {}
+
+    try:
+        for collection_name, specs in declared().items():
+            collection = db[collection_name]
+
+            for keys, options in specs:
+                label = _label(collection_name, keys)
+
+                try:
+                    name, info = _find(collection, keys)
+
+                    if name is None:
+                        collection.create_index(keys, **options)
+                        results[label] = "created"
+
+                    elif "expireAfterSeconds" in options and \
+                            info.get("expireAfterSeconds") != options["expireAfterSeconds"]:
+                        db.command(
+                            "collMod", collection_name,
+                            index={"name": name, "expireAfterSeconds": options["expireAfterSeconds"]}
+                        )
+                        results[label] = "updated"
+
+                    else:
+                        results[label] = "ok"
+
+                except OperationFailure as e:
+                    # e.g. duplicate emails already stored block the unique index
+                    results[label] = f"error: {e}"
+                    print(f"Index error on {label}:", e)
+
+        for collection_name, retired_keys in retired().items():
+            collection = db[collection_name]
+
+            for keys in retired_keys:
+                label = _label(collection_name, keys)
+
+                try:
+                    name, _ = _find(collection, keys)
+                    if name is not None:
+                        collection.drop_index(name)
+                        results[label] = "dropped"
+                except OperationFailure as e:
+                    results[label] = f"error: {e}"
+                    print(f"Index error on {label}:", e)
+    except PyMongoError as e:
+        # e.g. Mongo unreachable: stop here rather than wait out the
+        # server selection timeout once per index, and don't raise
+        results["*"] = f"error: {e}"
+        print("Could not ensure indexes:", e)
+
+    return results
+
+
+def check(db):
+    # Returns a list of problems; empty when every declared index exists
+    problems = []
+
+    try:
+        for collection_name, specs in declared().items():
+            collection = db[collection_name]
+
+            for keys, options in specs:
+                label = _label(collection_name, keys)
+                name, info = _find(collection, keys)
+
+                if name is None:
+                    problems.append(f"{label}: missing")
+                    continue
+
+                for option, value in options.items():
+                    if info.get(option) != value:
+                        problems.append(f"{label}: {option} is {info.get(option)}, expected {value}")
+
+        for collection_name, retired_keys in retired().items():
+            for keys in retired_keys:
+                if _find(db[collection_name], keys)[0] is not None:
+                    problems.append(f"{_label(collection_name, keys)}: retired, still present")
+    except PyMongoError as e:
+        problems.append(f"could not check indexes: {e}")
+
+    return problems
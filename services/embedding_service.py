@@ -0,0 +1,108 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from langchain_core.embeddings import Embeddings
+
+from config import Config
+from services import model_registry
+
+
+# =================== Batched Embedding Service ===================
+# Requests from concurrent uploads and queries are collected into
+# micro-batches (up to EMBED_MAX_BATCH texts or EMBED_MAX_WAIT_MS of
+# waiting) and embedded by one dedicated worker thread, so the CPU sees
+# a few large batches instead of many tiny ones competing for cores.
+
+_queue = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+counters = {
+    "requests": 0,
+    "texts": 0,
+    "batches": 0
+}
+
+
+def _ensure_worker():
+    global _worker
+
+    if _worker is None or not _worker.is_alive():
+        with _worker_lock:
+            if _worker is None or not _worker.is_alive():
+                _worker = threading.Thread(
+                    target=_run, name="embedding-service", daemon=True
+                )
+                _worker.start()
+
+
+def _collect_batch():
+    batch = [_queue.get()]
+    size = len(batch[0][0])
+    deadline = time.monotonic() + Config.EMBED_MAX_WAIT_MS / 1000
+
+    while size < Config.EMBED_MAX_BATCH:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            item = _queue.get(timeout=remaining)
+        except queue.Empty:
+            break
+        batch.append(item)
+        size += len(item[0])
+
+    return batch
+
+
+def _run():
+    while True:
+        batch = _collect_batch()
+        texts = [text for texts, _ in batch for text in texts]
+
+        try:
+            vectors = model_registry.get("embedding").embed_documents(texts)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            continue
+
+        counters["batches"] += 1
+        counters["texts"] += len(texts)
+
+        offset = 0
+        for request_texts, future in batch:
+            future.set_result(vectors[offset:offset + len(request_texts)])
+            offset += len(request_texts)
+
+
+def embed(texts):
+    texts = list(texts)
+    if not texts:
+        return []
+
+    future = Future()
+    counters["requests"] += 1
+    _ensure_worker()
+    _queue.put((texts, future))
+
+    return future.result(timeout=Config.EMBED_TIMEOUT)
+
+
+def stats():
+    data = dict(counters)
+    data["avg_batch_size"] = round(data["texts"] / data["batches"], 1) if data["batches"] else 0
+    data["queued"] = _queue.qsize()
+    return data
+
+
+class BatchedEmbeddings(Embeddings):
+    # Drop-in LangChain embeddings for both ingestion and query paths
+
+    def embed_documents(self, texts):
+        return embed(texts)
+
+    def embed_query(self, text):
+        return embed([text])[0]
@@ -0,0 +1,137 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from config import Config
+
+
+# =================== Feedback Cache ===================
+# Two tiers: a small in-process LRU with TTL in front of a MongoDB
+# collection shared by every worker. Keys hash the normalized answer
+# together with the prompt version and model name, so a template or
+# model change never serves stale feedback.
+
+_memory = OrderedDict()
+_lock = threading.Lock()
+_collection = None
+
+counters = {
+    "memory_hits": 0,
+    "mongo_hits": 0,
+    "misses": 0,
+    "stores": 0
+}
+
+
+def init(collection):
+    global _collection
+    _collection = collection
+
+
+def normalize_answer(answer):
+    return re.sub(r"\s+", " ", (answer or "").strip().lower())
+
+
+def make_key(answer, interview_type, advanced, prompt_version, model_name):
+    raw = "|".join([
+        normalize_answer(answer),
+        interview_type or "",
+        "advanced" if advanced else "basic",
+        prompt_version,
+        model_name
+    ])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _count(name):
+    with _lock:
+        counters[name] += 1
+
+
+def _remember(key, value):
+    with _lock:
+        _memory[key] = (time.time() + Config.FEEDBACK_CACHE_TTL, value)
+        _memory.move_to_end(key)
+        while len(_memory) > Config.FEEDBACK_CACHE_SIZE:
+            _memory.popitem(last=False)
+
+
+def get(key):
+    with _lock:
+        entry = _memory.get(key)
+        if entry and entry[0] > time.time():
+            _memory.move_to_end(key)
+            counters["memory_hits"] += 1
+            return dict(entry[1])
+        if entry:
+            del _memory[key]
+
+    if _collection is not None:
+        try:
+            doc = _collection.find_one({"_id": key}, {"result": 1})
+        except Exception as e:
+            print("Feedback cache read error:", e)
+            doc = None
+
+        if doc:
+            _remember(key, doc["result"])
+            _count("mongo_hits")
+            return dict(doc["result"])
+
+    _count("misses")
+    return None
+
+
+def put(key, result, prompt_version, model_name):
+    _remember(key, dict(result))
+    _count("stores")
+
+    if _collection is None:
+        return
+
+    try:
+        _collection.update_one(
+            {"_id": key},
+            {"$set": {
+                "result": result,
+                "prompt_version": prompt_version,
+                "model": model_name,
+                "created_at": datetime.now(timezone.utc)
+            }},
+            upsert=True
+        )
+    except Exception as e:
+        print("Feedback cache write error:", e)
+
+
+def invalidate(current_prompt_versions=None):
+    # Called when the prompt templates change. Drops the local tier and
+    # every persisted entry not from one of the current prompt versions
+    # (single and batch prompts are versioned separately), or all of them.
+    with _lock:
+        _memory.clear()
+
+    if _collection is None:
+        return 0
+
+    query = {}
+    if current_prompt_versions:
+        query = {"prompt_version": {"$nin": list(current_prompt_versions)}}
+
+    return _collection.delete_many(query).deleted_count
+
+
+def stats():
+    with _lock:
+        data = dict(counters)
+        data["memory_entries"] = len(_memory)
+
+    lookups = data["memory_hits"] + data["mongo_hits"] + data["misses"]
+    data["hit_rate"] = round(
+        (data["memory_hits"] + data["mongo_hits"]) / lookups, 3
+    ) if lookups else 0
+
+    return data
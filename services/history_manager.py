@@ -0,0 +1,162 @@
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+
+from config import Config
+from services import llm_executor
+from services import model_registry
+
+
+# =================== Interview History Manager ===================
+# Histories are stored as [{"role": ..., "content": ...}] with roles
+# system / summary / human / ai. Messages are stored in full (they are
+# shown back to the user); only the prompt copy of each message is
+# capped at HISTORY_MAX_MESSAGE_TOKENS. Once the history goes over its
+# token budget, older turns are folded into a single rolling summary
+# entry, down to HISTORY_COMPACT_TARGET of the budget and at most the
+# last K turns. That keeps each prompt roughly the same size no matter
+# how long the interview runs.
+
+SUMMARY_PROMPT = """
+You are keeping notes for an ongoing job interview.
+
+Update the running summary with the new exchanges below. Keep every
+question asked, the key facts and claims in the candidate's answers, and
+your impressions of their confidence, clarity and depth. Be concise.
+
+Current summary:
+{summary}
+
+New exchanges:
+{exchanges}
+
+Return only the updated summary.
+"""
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _encoding = None
+
+
+def count_tokens(text):
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return len(text) // 4 + 1
+
+
+def _prompt_content(msg):
+    if msg["role"] in ("human", "ai"):
+        return truncate_tokens(msg["content"], Config.HISTORY_MAX_MESSAGE_TOKENS)
+    return msg["content"]
+
+
+def _message_tokens(msg):
+    # +4 roughly covers role/formatting overhead
+    return count_tokens(_prompt_content(msg)) + 4
+
+
+def history_tokens(raw_history):
+    # Size of the prompt built from this history
+    return sum(_message_tokens(m) for m in raw_history)
+
+
+def truncate_tokens(text, max_tokens):
+    if count_tokens(text) <= max_tokens:
+        return text
+    if _encoding is not None:
+        return _encoding.decode(_encoding.encode(text)[:max_tokens]) + " …"
+    return text[:max_tokens * 4] + " …"
+
+
+def new_history(system_prompt):
+    return [{"role": "system", "content": system_prompt}]
+
+
+def add_message(raw_history, role, content):
+    raw_history.append({"role": role, "content": content})
+    return raw_history
+
+
+def to_messages(raw_history):
+    messages = []
+    for msg in raw_history:
+        if msg["role"] == "system":
+            messages.append(SystemMessage(content=msg["content"]))
+        elif msg["role"] == "summary":
+            messages.append(SystemMessage(
+                content="Summary of the interview so far:\n" + msg["content"]
+            ))
+        elif msg["role"] == "human":
+            messages.append(HumanMessage(content=_prompt_content(msg)))
+        elif msg["role"] == "ai":
+            messages.append(AIMessage(content=_prompt_content(msg)))
+    return messages
+
+
+def visible_turns(raw_history):
+    return [m for m in raw_history if m["role"] in ("human", "ai")]
+
+
+def _summarize(summary, turns):
+    exchanges = "\n".join(
+        f"{'Candidate' if m['role'] == 'human' else 'Interviewer'}: {m['content']}"
+        for m in turns
+    )
+    response = llm_executor.invoke(
+        model_registry.get("chat_model"),
+        SUMMARY_PROMPT.format(summary=summary or "(none yet)", exchanges=exchanges),
+        timeout=Config.HISTORY_SUMMARY_TIMEOUT
+    )
+    return response.content.strip()
+
+
+def _fallback_summary(summary, turns):
+    # No LLM available: keep a clipped transcript of the folded turns
+    lines = [summary] if summary else []
+    for m in turns:
+        speaker = "Candidate" if m["role"] == "human" else "Interviewer"
+        lines.append(f"{speaker}: {truncate_tokens(m['content'], 60)}")
+    return "\n".join(lines)
+
+
+def compact(raw_history, budget, keep_last_turns=None):
+    if keep_last_turns is None:
+        keep_last_turns = Config.HISTORY_KEEP_LAST_TURNS
+
+    if history_tokens(raw_history) <= budget:
+        return raw_history
+
+    system = [m for m in raw_history if m["role"] == "system"]
+    summary = next((m["content"] for m in raw_history if m["role"] == "summary"), "")
+    turns = visible_turns(raw_history)
+
+    # Fold older turns until the kept ones fit under the low-water mark:
+    # at most the last K turns (a turn is one candidate message plus the
+    # interviewer's reply), fewer when they are long, and always at least
+    # one folded turn so every compaction makes progress
+    target = budget * Config.HISTORY_COMPACT_TARGET - history_tokens(system) - \
+        Config.HISTORY_SUMMARY_MAX_TOKENS
+    keep_count = min(keep_last_turns * 2, max(len(turns) - 2, 0))
+    keep_count -= keep_count % 2
+
+    while keep_count > 0 and \
+            sum(_message_tokens(m) for m in turns[-keep_count:]) > target:
+        keep_count -= 2
+
+    old_turns = turns[:-keep_count] if keep_count else turns
+    recent_turns = turns[len(old_turns):]
+
+    if not old_turns:
+        return raw_history
+
+    try:
+        summary = _summarize(summary, old_turns)
+    except Exception as e:
+        print("History summary error:", e)
+        summary = _fallback_summary(summary, old_turns)
+
+    summary = truncate_tokens(summary, Config.HISTORY_SUMMARY_MAX_TOKENS)
+
+    return system + [{"role": "summary", "content": summary}] + recent_turns
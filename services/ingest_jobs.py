@@ -0,0 +1,230 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+
+from config import Config
+from services import resume_index
+from services import retriever_cache
+from services import retrieval_cache
+
+
+# =================== Resume Ingestion Jobs ===================
+# Uploads only enqueue a job document; background threads claim queued
+# jobs atomically from MongoDB, so any worker can run them and jobs
+# survive a restart. Each job records its status
+# (queued/running/done/failed), per-stage timings and any error, plus
+# the hash of the file it was given, so a file that already failed is
+# not queued again until it changes.
+#
+# Workers only run in the serving process (start() is called from the
+# app's serve hook), never as an import side effect: CLI commands and
+# helper processes only enqueue.
+
+_collection = None
+_wakeup = threading.Event()
+_threads = []
+_threads_lock = threading.Lock()
+_started = False
+
+
+def init(collection):
+    global _collection
+    _collection = collection
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _resume_hash(resume_path):
+    try:
+        return resume_index.file_hash(resume_path)
+    except OSError:
+        return None
+
+
+def enqueue(user_id, resume_path):
+    job_id = _collection.insert_one({
+        "user_id": user_id,
+        "resume_path": resume_path,
+        "resume_hash": _resume_hash(resume_path),
+        "status": "queued",
+        "created_at": _now(),
+        "started_at": None,
+        "finished_at": None,
+        "attempts": 0,
+        "timings": {},
+        "result": None,
+        "error": None
+    }).inserted_id
+
+    if _started:
+        _ensure_workers()
+    _wakeup.set()
+
+    return str(job_id)
+
+
+def get_job(job_id, user_id):
+    try:
+        job = _collection.find_one({"_id": ObjectId(job_id), "user_id": user_id})
+    except Exception:
+        return None
+
+    if job:
+        job["_id"] = str(job["_id"])
+    return job
+
+
+def active_job(user_id):
+    return _collection.find_one(
+        {"user_id": user_id, "status": {"$in": ["queued", "running"]}},
+        {"_id": 1, "status": 1},
+        sort=[("created_at", -1)]
+    )
+
+
+def last_failure(user_id, resume_path=None):
+    # The user's latest job if it failed; with resume_path, only when it
+    # failed on that exact file as it is now
+    job = _collection.find_one(
+        {"user_id": user_id},
+        {"status": 1, "error": 1, "resume_path": 1, "resume_hash": 1},
+        sort=[("created_at", -1)]
+    )
+
+    if not job or job["status"] != "failed":
+        return None
+
+    if resume_path is not None and (
+        job.get("resume_path") != resume_path or
+        job.get("resume_hash") != _resume_hash(resume_path)
+    ):
+        return None
+
+    return job
+
+
+def record_failure(user_id, resume_path, error):
+    # A failed job for this file without running it, e.g. when maintenance
+    # dropped an over-quota resume: it is not re-ingested until replaced
+    _collection.insert_one({
+        "user_id": user_id,
+        "resume_path": resume_path,
+        "resume_hash": _resume_hash(resume_path),
+        "status": "failed",
+        "created_at": _now(),
+        "started_at": None,
+        "finished_at": _now(),
+        "attempts": 0,
+        "timings": {},
+        "result": None,
+        "error": error
+    })
+
+
+def _claim():
+    # Jobs left "running" by a crashed worker are picked up again
+    stale = _now() - timedelta(seconds=Config.INGEST_JOB_STALE_SECONDS)
+
+    return _collection.find_one_and_update(
+        {"$or": [
+            {"status": "queued"},
+            {"status": "running", "started_at": {"$lt": stale}}
+        ]},
+        {"$set": {"status": "running", "started_at": _now()},
+         "$inc": {"attempts": 1}},
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def _requeue(job):
+    # Not the job's fault: give the attempt back and let it wait its turn
+    _collection.update_one(
+        {"_id": job["_id"], "status": "running"},
+        {"$set": {"status": "queued", "started_at": None},
+         "$inc": {"attempts": -1}}
+    )
+
+
+def _run_job(job):
+    # Returns False when the job could not run here and was put back
+    started = time.perf_counter()
+    timings = {}
+
+    try:
+        if job["attempts"] > Config.INGEST_JOB_MAX_ATTEMPTS:
+            raise RuntimeError("Too many attempts")
+
+        result = resume_index.ingest_resume(job["user_id"], job["resume_path"], timings)
+        result.pop("timings", None)
+        retriever_cache.invalidate(job["user_id"])
+        retrieval_cache.invalidate_user(job["user_id"])
+
+        timings["total"] = round(time.perf_counter() - started, 3)
+
+        _collection.update_one(
+            {"_id": job["_id"]},
+            {"$set": {
+                "status": "done",
+                "finished_at": _now(),
+                "timings": timings,
+                "result": result
+            }}
+        )
+
+    except resume_index.ResumeIndexBusy as e:
+        # Another process holds the local index (e.g. a CLI command)
+        print("Resume index busy, job requeued:", e)
+        _requeue(job)
+        return False
+
+    except Exception as e:
+        print("Resume ingestion failed:", e)
+        # Keeps the stages that did run, e.g. how long parsing took to fail
+        timings["total"] = round(time.perf_counter() - started, 3)
+        _collection.update_one(
+            {"_id": job["_id"]},
+            {"$set": {
+                "status": "failed",
+                "finished_at": _now(),
+                "timings": timings,
+                "error": str(e) or e.__class__.__name__
+            }}
+        )
+
+    return True
+
+
+def _worker():
+    while True:
+        try:
+            job = _claim()
+        except Exception as e:
+            print("Ingest job claim error:", e)
+            job = None
+
+        if job is None or not _run_job(job):
+            _wakeup.wait(Config.INGEST_JOB_POLL_SECONDS)
+            _wakeup.clear()
+
+
+def _ensure_workers():
+    with _threads_lock:
+        _threads[:] = [t for t in _threads if t.is_alive()]
+        while len(_threads) < Config.INGEST_JOB_WORKERS:
+            thread = threading.Thread(
+                target=_worker, name=f"resume-ingest-{len(_threads)}", daemon=True
+            )
+            thread.start()
+            _threads.append(thread)
+
+
+def start():
+    global _started
+    _started = True
+    _ensure_workers()
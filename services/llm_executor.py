@@ -0,0 +1,231 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import TimeoutError as FuturesTimeout
+
+from config import Config
+
+
+# =================== LLM Execution Layer ===================
+# Every LLM call goes through one asyncio loop running in a background
+# thread. Calls use ainvoke, share a global concurrency limit and get a
+# hard deadline (queue wait included); on timeout the request to Groq
+# is cancelled instead of being left running.
+#
+# Sync code calls invoke()/stream(), which park the calling thread on a
+# future while the network I/O is multiplexed on the loop. Async views
+# await ainvoke(); astream() can be consumed from any event loop, which
+# is how the ASGI entry point streams replies without a thread per
+# interview (see services/sse_bridge.py).
+
+class LLMTimeout(Exception):
+    pass
+
+
+_loop = None
+_semaphore = None
+_lock = threading.Lock()
+
+counters = {
+    "in_flight": 0,
+    "waiting": 0,
+    "completed": 0,
+    "timeouts": 0,
+    "errors": 0
+}
+
+
+def _ensure_loop():
+    global _loop, _semaphore
+
+    if _loop is not None:
+        return _loop
+
+    with _lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            threading.Thread(target=run, name="llm-executor", daemon=True).start()
+            ready.wait()
+
+            _semaphore = asyncio.run_coroutine_threadsafe(
+                _make_semaphore(), loop
+            ).result()
+            _loop = loop
+
+    return _loop
+
+
+async def _make_semaphore():
+    return asyncio.Semaphore(Config.LLM_MAX_CONCURRENCY)
+
+
+async def _guarded(runnable, value, kwargs):
+    counters["waiting"] += 1
+    try:
+        await _semaphore.acquire()
+    finally:
+        counters["waiting"] -= 1
+
+    counters["in_flight"] += 1
+    try:
+        return await runnable.ainvoke(value, **kwargs)
+    finally:
+        counters["in_flight"] -= 1
+        _semaphore.release()
+
+
+async def _call(runnable, value, timeout, kwargs):
+    try:
+        result = await asyncio.wait_for(_guarded(runnable, value, kwargs), timeout)
+    except asyncio.TimeoutError:
+        counters["timeouts"] += 1
+        raise LLMTimeout(f"LLM call exceeded {timeout}s")
+    except Exception:
+        counters["errors"] += 1
+        raise
+
+    counters["completed"] += 1
+    return result
+
+
+def invoke(runnable, value, timeout=None, **kwargs):
+    timeout = timeout or Config.LLM_TIMEOUT
+    loop = _ensure_loop()
+
+    future = asyncio.run_coroutine_threadsafe(
+        _call(runnable, value, timeout, kwargs), loop
+    )
+
+    try:
+        # The loop enforces the deadline; the grace period only covers
+        # a loop that is itself stuck.
+        return future.result(timeout + 5)
+    except FuturesTimeout:
+        future.cancel()
+        raise LLMTimeout(f"LLM call exceeded {timeout}s")
+
+
+async def ainvoke(runnable, value, timeout=None, **kwargs):
+    timeout = timeout or Config.LLM_TIMEOUT
+    loop = _ensure_loop()
+
+    if asyncio.get_running_loop() is loop:
+        return await _call(runnable, value, timeout, kwargs)
+
+    return await asyncio.wrap_future(
+        asyncio.run_coroutine_threadsafe(_call(runnable, value, timeout, kwargs), loop)
+    )
+
+
+# ---------------- Token streaming ----------------
+
+_STREAM_END = object()
+
+
+async def _stream_into(runnable, value, emit, kwargs):
+    counters["waiting"] += 1
+    try:
+        await _semaphore.acquire()
+    finally:
+        counters["waiting"] -= 1
+
+    counters["in_flight"] += 1
+    try:
+        async for chunk in runnable.astream(value, **kwargs):
+            text = getattr(chunk, "content", chunk)
+            if text:
+                emit(text)
+    finally:
+        counters["in_flight"] -= 1
+        _semaphore.release()
+
+
+async def _stream_call(runnable, value, emit, timeout, kwargs):
+    try:
+        await asyncio.wait_for(_stream_into(runnable, value, emit, kwargs), timeout)
+        counters["completed"] += 1
+    except asyncio.TimeoutError:
+        counters["timeouts"] += 1
+        emit(LLMTimeout(f"LLM call exceeded {timeout}s"))
+    except Exception as e:
+        counters["errors"] += 1
+        emit(e)
+    finally:
+        emit(_STREAM_END)
+
+
+def stream(runnable, value, timeout=None, **kwargs):
+    # Sync generator of text chunks. Closing it early (client went away)
+    # cancels the upstream request.
+    timeout = timeout or Config.LLM_TIMEOUT
+    loop = _ensure_loop()
+    out = queue.Queue()
+
+    future = asyncio.run_coroutine_threadsafe(
+        _stream_call(runnable, value, out.put, timeout, kwargs), loop
+    )
+    deadline = time.monotonic() + timeout + 5
+
+    try:
+        while True:
+            try:
+                item = out.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                raise LLMTimeout(f"LLM call exceeded {timeout}s")
+
+            if item is _STREAM_END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        future.cancel()
+
+
+async def astream(runnable, value, timeout=None, **kwargs):
+    # Async generator of text chunks for any event loop (e.g. the ASGI
+    # server's). Chunks are handed over with call_soon_threadsafe, so no
+    # thread waits on the stream.
+    timeout = timeout or Config.LLM_TIMEOUT
+    loop = _ensure_loop()
+    consumer = asyncio.get_running_loop()
+    out = asyncio.Queue()
+
+    future = asyncio.run_coroutine_threadsafe(
+        _stream_call(
+            runnable, value,
+            lambda item: consumer.call_soon_threadsafe(out.put_nowait, item),
+            timeout, kwargs
+        ),
+        loop
+    )
+    deadline = time.monotonic() + timeout + 5
+
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(out.get(), max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                raise LLMTimeout(f"LLM call exceeded {timeout}s")
+
+            if item is _STREAM_END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        future.cancel()
+
+
+def stats():
+    data = dict(counters)
+    data["max_concurrency"] = Config.LLM_MAX_CONCURRENCY
+    return data
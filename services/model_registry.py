@@ -0,0 +1,100 @@
+import threading
+import time
+
+
+# =================== Model Registry ===================
+# Models are registered with a loader and only built the first time
+# something asks for them, so workers that never touch voice or RAG
+# never pay for Whisper or the embedding model.
+
+_loaders = {}
+_models = {}
+_stats = {}
+_locks = {}
+_lock = threading.Lock()
+
+
+def _rss_bytes():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        import resource
+        return pages * resource.getpagesize()
+    except (OSError, ImportError, ValueError, IndexError):
+        return 0
+
+
+def register(name, loader):
+    with _lock:
+        _loaders[name] = loader
+        _locks[name] = threading.Lock()
+        _models.pop(name, None)
+        _stats[name] = {"loaded": False}
+
+
+def get(name):
+    model = _models.get(name)
+    if model is not None:
+        return model
+
+    if name not in _loaders:
+        raise KeyError(f"Unknown model: {name}")
+
+    # One lock per model so a slow Whisper load doesn't block the LLM clients
+    with _locks[name]:
+        model = _models.get(name)
+        if model is not None:
+            return model
+
+        rss_before = _rss_bytes()
+        started = time.perf_counter()
+
+        model = _loaders[name]()
+
+        load_seconds = time.perf_counter() - started
+        rss_after = _rss_bytes()
+
+        _models[name] = model
+        _stats[name] = {
+            "loaded": True,
+            "load_seconds": round(load_seconds, 3),
+            "rss_delta_mb": round(max(rss_after - rss_before, 0) / (1024 * 1024), 1),
+            "rss_after_mb": round(rss_after / (1024 * 1024), 1),
+            "loaded_at": time.time()
+        }
+
+    print(f"Model loaded: {name} in {load_seconds:.2f}s "
+          f"(+{_stats[name]['rss_delta_mb']} MB)")
+
+    return model
+
+
+def is_loaded(name):
+    return name in _models
+
+
+def preload(names=None):
+    if names is None:
+        names = list(_loaders)
+
+    for name in names:
+        name = name.strip()
+        if not name:
+            continue
+        try:
+            get(name)
+        except Exception as e:
+            print(f"Model preload failed for {name}:", e)
+
+
+def stats():
+    return {
+        name: dict(_stats.get(name, {"loaded": False}))
+        for name in _loaders
+    }
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import queue
+import re
+import threading
+from datetime import datetime, timezone
+
+from config import Config
+from services import llm_executor
+from services import model_registry
+
+
+# =================== Quiz Question Pool ===================
+# Generated MCQs are kept per (language, difficulty) in MongoDB and
+# deduplicated by a hash of the question text. Quizzes are sampled from
+# the pool; a background thread tops a pool up once it drops below the
+# low watermark, so the LLM is only hit on a cold pool.
+
+QUIZ_PROMPT = """
+You are an expert technical interviewer.
+
+Generate 10 {difficulty} level multiple choice questions for {language} Programming Language.
+
+Return ONLY valid JSON in this format:
+
+{{
+  "questions": [
+    {{
+      "question": "Question text",
+      "options": ["Option A", "Option B", "Option C", "Option D"],
+      "answer": "A"
+    }}
+  ]
+}}
+
+Rules:
+- Return ONLY raw JSON
+- No explanation
+- No markdown
+- No extra text
+- Answer must be A, B, C, or D only
+"""
+
+_collection = None
+_refill_queue = queue.Queue()
+_refill_pending = set()
+_refill_lock = threading.Lock()
+_refill_thread = None
+
+
+def init(collection):
+    global _collection
+    _collection = collection
+
+
+def pool_key(language, difficulty):
+    return (language or "").strip().lower(), (difficulty or "").strip().lower()
+
+
+def question_hash(question):
+    text = re.sub(r"\s+", " ", question["question"].strip().lower())
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _valid(question):
+    return (
+        isinstance(question, dict)
+        and isinstance(question.get("question"), str)
+        and question["question"].strip()
+        and isinstance(question.get("options"), list)
+        and len(question["options"]) == 4
+        and question.get("answer") in ("A", "B", "C", "D")
+    )
+
+
+def generate_questions(language, difficulty):
+    response = llm_executor.invoke(
+        model_registry.get("llm"),
+        QUIZ_PROMPT.format(language=language, difficulty=difficulty),
+        timeout=Config.QUIZ_GENERATION_TIMEOUT
+    )
+
+    response_text = response.content.strip()
+    response_text = response_text.replace("```json", "")
+    response_text = response_text.replace("```", "")
+    response_text = response_text.strip()
+
+    data = json.loads(response_text)
+    return [q for q in data.get("questions", []) if _valid(q)]
+
+
+def add_questions(language, difficulty, questions):
+    language_key, difficulty_key = pool_key(language, difficulty)
+    added = 0
+
+    for q in questions:
+        result = _collection.update_one(
+            {
+                "language": language_key,
+                "difficulty": difficulty_key,
+                "hash": question_hash(q)
+            },
+            {"$setOnInsert": {
+                "question": q["question"],
+                "options": q["options"],
+                "answer": q["answer"],
+                "created_at": datetime.now(timezone.utc)
+            }},
+            upsert=True
+        )
+        if result.upserted_id is not None:
+            added += 1
+
+    return added
+
+
+def count(language, difficulty):
+    language_key, difficulty_key = pool_key(language, difficulty)
+    return _collection.count_documents(
+        {"language": language_key, "difficulty": difficulty_key}
+    )
+
+
+def sample(language, difficulty, size):
+    language_key, difficulty_key = pool_key(language, difficulty)
+    return list(_collection.aggregate([
+        {"$match": {"language": language_key, "difficulty": difficulty_key}},
+        {"$sample": {"size": size}},
+        {"$project": {"_id": 0, "question": 1, "options": 1, "answer": 1}}
+    ]))
+
+
+def get_quiz(language, difficulty, size=10):
+    available = count(language, difficulty)
+
+    # Cold pool: generate inline once so this user still gets a quiz
+    if available < size:
+        questions = generate_questions(language, difficulty)
+        add_questions(language, difficulty, questions)
+        available = count(language, difficulty)
+
+        if available < size:
+            request_refill(language, difficulty)
+            return questions[:size]
+
+    if available < Config.QUIZ_POOL_LOW_WATERMARK:
+        request_refill(language, difficulty)
+
+    return sample(language, difficulty, size)
+
+
+# ---------------- Background refill ----------------
+
+def request_refill(language, difficulty):
+    key = pool_key(language, difficulty)
+
+    with _refill_lock:
+        if key in _refill_pending:
+            return
+        _refill_pending.add(key)
+        _ensure_refill_thread()
+
+    _refill_queue.put((language, difficulty))
+
+
+def _ensure_refill_thread():
+    global _refill_thread
+
+    if _refill_thread is None or not _refill_thread.is_alive():
+        _refill_thread = threading.Thread(
+            target=_refill_worker, name="quiz-refill", daemon=True
+        )
+        _refill_thread.start()
+
+
+def refill(language, difficulty):
+    # Stop early when the model keeps repeating questions we already have
+    for _ in range(Config.QUIZ_POOL_MAX_REFILL_CALLS):
+        if count(language, difficulty) >= Config.QUIZ_POOL_TARGET:
+            return
+        if add_questions(language, difficulty, generate_questions(language, difficulty)) == 0:
+            return
+
+
+def _refill_worker():
+    while True:
+        language, difficulty = _refill_queue.get()
+        try:
+            refill(language, difficulty)
+        except Exception as e:
+            print("Quiz pool refill error:", e)
+        finally:
+            with _refill_lock:
+                _refill_pending.discard(pool_key(language, difficulty))
@@ -0,0 +1,69 @@
+from datetime import datetime, timezone
+
+from config import Config
+from services import history_manager
+
+
+# =================== Resume Interview Sessions ===================
+# The final (resume-based) interview is one conversation per user, kept
+# in MongoDB regardless of SESSION_STORE, so any worker can serve the
+# next message and a restart loses nothing (with several workers the
+# resume index must be a Chroma server too, see resume_index). Turns are appended with
+# $push, so two workers answering at once never overwrite each other.
+# The resume_hash records which resume version the interview is about.
+# The history is compacted like the chat/voice ones (see compact()) and
+# capped at RAG_HISTORY_MAX_MESSAGES, so neither the document nor the
+# prompt grows without limit.
+
+_collection = None
+
+
+def init(collection):
+    global _collection
+    _collection = collection
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def load(user_id):
+    doc = _collection.find_one({"_id": user_id}, {"history": 1})
+    return doc["history"] if doc else []
+
+
+def append_turn(user_id, user_input, reply, resume_hash=None):
+    turn = []
+    history_manager.add_message(turn, "human", user_input)
+    history_manager.add_message(turn, "ai", reply)
+
+    update = {"updated_at": _now()}
+    if resume_hash:
+        update["resume_hash"] = resume_hash
+
+    _collection.update_one(
+        {"_id": user_id},
+        {"$push": {"history": {"$each": turn, "$slice": -Config.RAG_HISTORY_MAX_MESSAGES}},
+         "$set": update,
+         "$setOnInsert": {"created_at": _now()}},
+        upsert=True
+    )
+
+
+def compact(user_id, history, budget):
+    # Returns the history to prompt with. The compacted copy is stored
+    # only if no turn was appended meanwhile (the array length still
+    # matches), otherwise the next request compacts again.
+    compacted = history_manager.compact(history, budget)
+
+    if compacted is not history:
+        _collection.update_one(
+            {"_id": user_id, "history": {"$size": len(history)}},
+            {"$set": {"history": compacted, "updated_at": _now()}}
+        )
+
+    return compacted
+
+
+def reset(user_id):
+    _collection.delete_one({"_id": user_id})
@@ -0,0 +1,316 @@
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import chromadb
+from langchain_community.vectorstores import Chroma
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from config import Config
+from services import embedding_service
+from services import resume_parser
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no advisory locks, the single-process rule is not enforced
+    fcntl = None
+
+
+# =================== Resume Ingestion ===================
+# Ingestion is keyed by content hashes. Every chunk is stored under an id
+# derived from (user, chunk text) and tagged with the hash of the file it
+# came from, so:
+#   - re-uploading a byte-identical resume skips parsing and embedding,
+#   - an edited resume only embeds chunks whose text actually changed,
+#   - chunks that disappeared from the resume are deleted, never duplicated.
+#
+# All users share one Chroma collection; every chunk carries its user_id
+# and every read is filtered on it.
+#
+# A local Chroma store (RESUME_INDEX_DIR) is not multi-process safe: each
+# process keeps its own HNSW index in memory and never sees another
+# process's writes. So either
+#   - set CHROMA_HOST to a Chroma server, which every process talks to
+#     (required with more than one worker, e.g. gunicorn -w 4), or
+#   - run a single process; the local store is locked to the first
+#     process that opens it, and any other one fails loudly.
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+COLLECTION_NAME = "resumes"
+LOCK_FILE = ".owner.lock"
+
+_shared_store = None
+_shared_lock = threading.Lock()
+_owner_lock = None
+
+
+class ResumeIndexBusy(RuntimeError):
+    pass
+
+
+def is_remote():
+    return bool(Config.CHROMA_HOST)
+
+
+def _lock_local_store(index_dir):
+    # Held (on an open file) for the life of the process
+    global _owner_lock
+
+    if fcntl is None:
+        return
+
+    handle = open(os.path.join(index_dir, LOCK_FILE), "a")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        raise ResumeIndexBusy(
+            f"{index_dir} is already open in another process; "
+            "set CHROMA_HOST to share the index between workers"
+        )
+
+    _owner_lock = handle
+
+
+def shared_store():
+    global _shared_store
+
+    if _shared_store is None:
+        with _shared_lock:
+            if _shared_store is None:
+                if is_remote():
+                    _shared_store = Chroma(
+                        collection_name=COLLECTION_NAME,
+                        client=chromadb.HttpClient(host=Config.CHROMA_HOST, port=Config.CHROMA_PORT),
+                        embedding_function=embedding_service.BatchedEmbeddings()
+                    )
+                else:
+                    os.makedirs(Config.RESUME_INDEX_DIR, exist_ok=True)
+                    _lock_local_store(Config.RESUME_INDEX_DIR)
+                    _shared_store = Chroma(
+                        collection_name=COLLECTION_NAME,
+                        persist_directory=Config.RESUME_INDEX_DIR,
+                        embedding_function=embedding_service.BatchedEmbeddings()
+                    )
+
+    return _shared_store
+
+
+def persist(vectorstore=None):
+    # A Chroma server persists on its own
+    if not is_remote():
+        (shared_store() if vectorstore is None else vectorstore).persist()
+
+
+def user_filter(user_id):
+    return {"user_id": user_id}
+
+
+def has_resume(user_id):
+    return bool(shared_store().get(where=user_filter(user_id), limit=1, include=[])["ids"])
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(user_id, text):
+    return hashlib.sha256(f"{user_id}\n{text}".encode("utf-8")).hexdigest()
+
+
+class ResumeLimitExceeded(ValueError):
+    pass
+
+
+def iter_resume_pages(file_path):
+    # Yields one page Document at a time, enforcing size, page and time
+    # limits; the parser process is killed once it has kept us waiting
+    # RESUME_PARSE_TIMEOUT in total (time spent ingesting pages excluded)
+    if os.path.getsize(file_path) > Config.RESUME_MAX_BYTES:
+        raise ResumeLimitExceeded("Resume file is too large")
+
+    pages = resume_parser.iter_pages(file_path, Config.RESUME_PARSE_TIMEOUT)
+
+    try:
+        for count, page in enumerate(pages, start=1):
+            if count > Config.RESUME_MAX_PAGES:
+                raise ResumeLimitExceeded(f"Resume has more than {Config.RESUME_MAX_PAGES} pages")
+            yield page
+    except resume_parser.ParseTimeout:
+        raise ResumeLimitExceeded("Resume took too long to parse")
+    finally:
+        pages.close()
+
+
+def load_resume_document(file_path):
+    return list(iter_resume_pages(file_path))
+
+
+def split_resume(documents, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP):
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap
+    )
+    return splitter.split_documents(documents)
+
+
+@contextmanager
+def timed_stage(timings, name):
+    # Accumulates, so per-page work adds up to one figure per stage
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = round(timings.get(name, 0) + time.perf_counter() - started, 3)
+
+
+def ingest_resume(user_id, resume_path, timings=None, vectorstore=None,
+                  chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP):
+    # Returns a summary of what was (or wasn't) embedded, with per-stage timings.
+    # Pages are parsed, split and embedded one at a time, so memory stays at
+    # about one page plus one batch of chunks whatever the file size.
+    # Pass `timings` to keep the stages that ran when ingestion fails;
+    # vectorstore and the chunk settings are overridden by the benchmark.
+
+    timings = {} if timings is None else timings
+    if vectorstore is None:
+        vectorstore = shared_store()
+
+    with timed_stage(timings, "hash"):
+        resume_hash = file_hash(resume_path)
+        existing = vectorstore.get(where=user_filter(user_id), include=["metadatas"])
+
+    existing_ids = existing["ids"]
+    existing_hashes = {
+        (meta or {}).get("resume_hash") for meta in existing["metadatas"]
+    }
+
+    if existing_ids and existing_hashes == {resume_hash}:
+        return {"resume_hash": resume_hash, "unchanged": True,
+                "added": 0, "removed": 0, "kept": len(existing_ids),
+                "pages": 0, "timings": timings}
+
+    existing_set = set(existing_ids)
+    seen = set()
+    added = []
+    kept = []
+    batch = []
+    pages = 0
+
+    def flush():
+        with timed_stage(timings, "embed"):
+            vectorstore.add_documents(
+                [doc for _, doc in batch], ids=[cid for cid, _ in batch]
+            )
+        added.extend(cid for cid, _ in batch)
+        batch.clear()
+
+    try:
+        page_iter = iter_resume_pages(resume_path)
+        while True:
+            with timed_stage(timings, "parse"):
+                page = next(page_iter, None)
+            if page is None:
+                break
+            pages += 1
+
+            with timed_stage(timings, "split"):
+                docs = split_resume([page], chunk_size, chunk_overlap)
+
+            for doc in docs:
+                cid = chunk_id(user_id, doc.page_content)
+                if cid in seen:
+                    continue
+                seen.add(cid)
+
+                doc.metadata["user_id"] = user_id
+                doc.metadata["resume_hash"] = resume_hash
+
+                if cid in existing_set:
+                    kept.append((cid, doc.metadata))
+                else:
+                    batch.append((cid, doc))
+                    if len(batch) >= Config.RESUME_INGEST_BATCH:
+                        flush()
+
+        if batch:
+            flush()
+
+    except Exception:
+        # Leave the previous version of the resume intact
+        if added:
+            vectorstore.delete(ids=added)
+        raise
+
+    stale_ids = [cid for cid in existing_ids if cid not in seen]
+
+    with timed_stage(timings, "embed"):
+        if stale_ids:
+            vectorstore.delete(ids=stale_ids)
+
+        # Unchanged chunks only need their file hash bumped, not re-embedding
+        if kept:
+            vectorstore._collection.update(
+                ids=[cid for cid, _ in kept],
+                metadatas=[meta for _, meta in kept]
+            )
+
+    with timed_stage(timings, "persist"):
+        persist(vectorstore)
+
+    return {"resume_hash": resume_hash, "unchanged": False,
+            "added": len(added), "removed": len(stale_ids), "kept": len(kept),
+            "pages": pages, "timings": timings}
+
+
+def delete_user_chunks(user_id):
+    shared_store()._collection.delete(where=user_filter(user_id))
+
+
+# ---------------- Migration from per-user stores ----------------
+
+def migrate_user_store(user_id, store_dir):
+    # Copies a legacy per-user Chroma store into the shared collection,
+    # reusing the stored embeddings instead of recomputing them.
+    legacy = Chroma(persist_directory=store_dir)
+    data = legacy.get(include=["documents", "metadatas", "embeddings"])
+
+    if not data["ids"]:
+        return 0
+
+    ids = []
+    documents = []
+    metadatas = []
+    embeddings = []
+    seen = set()
+
+    for text, meta, embedding in zip(data["documents"], data["metadatas"], data["embeddings"]):
+        cid = chunk_id(user_id, text)
+        if cid in seen:
+            continue
+        seen.add(cid)
+
+        meta = dict(meta or {})
+        meta["user_id"] = user_id
+
+        ids.append(cid)
+        documents.append(text)
+        metadatas.append(meta)
+        embeddings.append(list(embedding))
+
+    shared_store()._collection.upsert(
+        ids=ids,
+        documents=documents,
+        metadatas=metadatas,
+        embeddings=embeddings
+    )
+
+    return len(ids)
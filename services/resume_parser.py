@@ -0,0 +1,101 @@
+import os
+import pickle
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+
+# =================== Resume Parser Process ===================
+# Resumes are parsed in a separate Python process so a pathological PDF
+# can be stopped at a hard deadline: a thread stuck inside pypdf cannot
+# be interrupted, a process can be killed. The child sends pages back
+# one at a time (pickled over stdout), so the caller still streams them.
+# The child runs this file as a script and imports nothing from the app.
+
+class ParseTimeout(Exception):
+    pass
+
+
+def make_loader(file_path):
+    from langchain_community.document_loaders import PyPDFLoader, TextLoader
+
+    if file_path.lower().endswith(".pdf"):
+        return PyPDFLoader(file_path)
+    if file_path.lower().endswith(".txt"):
+        return TextLoader(file_path, encoding="utf-8")
+    raise ValueError("Unsupported format")
+
+
+def _read(stream, out):
+    # Reader thread: unpickles messages until the child exits or is killed
+    try:
+        while True:
+            out.put(pickle.load(stream))
+    except Exception:
+        out.put(("exit", None))
+    finally:
+        stream.close()
+
+
+def iter_pages(file_path, timeout):
+    if not file_path.lower().endswith((".pdf", ".txt")):
+        raise ValueError("Unsupported format")
+
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), file_path],
+        stdin=subprocess.DEVNULL, stdout=subprocess.PIPE
+    )
+    messages = queue.Queue()
+    threading.Thread(
+        target=_read, args=(process.stdout, messages), name="resume-parser", daemon=True
+    ).start()
+
+    # Only the time spent waiting on the child counts; while the caller
+    # holds a page (splitting, embedding) the clock is stopped
+    remaining = timeout
+
+    try:
+        while True:
+            started = time.monotonic()
+            try:
+                kind, value = messages.get(timeout=max(remaining, 0))
+            except queue.Empty:
+                raise ParseTimeout(f"parsing took longer than {timeout}s")
+            remaining -= time.monotonic() - started
+
+            if kind == "page":
+                yield value
+            elif kind == "end":
+                return
+            elif kind == "error":
+                raise ValueError(value)
+            else:
+                raise RuntimeError("Resume parser exited unexpectedly")
+    finally:
+        # Also runs when the caller stops early (e.g. too many pages)
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+
+
+def _child(file_path):
+    out = sys.stdout.buffer
+    # Keep library output off the message stream
+    sys.stdout = sys.stderr
+
+    def send(kind, value):
+        pickle.dump((kind, value), out)
+        out.flush()
+
+    try:
+        for page in make_loader(file_path).lazy_load():
+            send("page", page)
+        send("end", None)
+    except Exception as e:
+        send("error", str(e) or e.__class__.__name__)
+
+
+if __name__ == "__main__":
+    _child(sys.argv[1])
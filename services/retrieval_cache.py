@@ -0,0 +1,88 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from config import Config
+
+
+# =================== Retrieval Result Cache ===================
+# Retrieved resume chunks are cached per user, keyed on the normalized
+# query and the resume's content version (its file hash). Re-ingesting a
+# resume changes the version, so stale results can never be served.
+# Very short conversational turns ("hi", "yes", "next question") reuse
+# the user's most recent context and never touch the embedding model.
+
+_entries = OrderedDict()
+_last_context = {}
+_lock = threading.Lock()
+
+counters = {
+    "hits": 0,
+    "misses": 0,
+    "reused_context": 0
+}
+
+
+def normalize_query(query):
+    text = re.sub(r"[^\w\s]", " ", (query or "").lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def is_small_talk(query):
+    return len(normalize_query(query).split()) < Config.RETRIEVAL_MIN_QUERY_WORDS
+
+
+def get(user_id, version, query):
+    key = (user_id, version, normalize_query(query))
+    now = time.time()
+
+    with _lock:
+        entry = _entries.get(key)
+        if entry and entry[0] > now:
+            _entries.move_to_end(key)
+            counters["hits"] += 1
+            return entry[1]
+        if entry:
+            del _entries[key]
+
+        if is_small_talk(query):
+            last = _last_context.get(user_id)
+            if last and last[0] == version:
+                counters["reused_context"] += 1
+                return last[1]
+
+        counters["misses"] += 1
+        return None
+
+
+def put(user_id, version, query, docs):
+    key = (user_id, version, normalize_query(query))
+
+    with _lock:
+        _entries[key] = (time.time() + Config.RETRIEVAL_CACHE_TTL, docs)
+        _entries.move_to_end(key)
+        _last_context[user_id] = (version, docs)
+
+        while len(_entries) > Config.RETRIEVAL_CACHE_SIZE:
+            _entries.popitem(last=False)
+
+        # _last_context only tracks users still present in the LRU
+        if len(_last_context) > Config.RETRIEVAL_CACHE_SIZE:
+            live = {k[0] for k in _entries}
+            for uid in [uid for uid in _last_context if uid not in live]:
+                del _last_context[uid]
+
+
+def invalidate_user(user_id):
+    with _lock:
+        for key in [k for k in _entries if k[0] == user_id]:
+            del _entries[key]
+        _last_context.pop(user_id, None)
+
+
+def stats():
+    with _lock:
+        data = dict(counters)
+        data["size"] = len(_entries)
+    return data
@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import OrderedDict
+
+from config import Config
+
+
+# =================== Resume Retriever Cache ===================
+# Per-user retrievers over the shared resume index are kept in a bounded
+# LRU with an idle timeout instead of a dict that grows with every
+# premium user. An evicted (or never opened) entry is rebuilt from the
+# persisted index on the next request; nothing is re-embedded.
+
+_entries = OrderedDict()
+_lock = threading.Lock()
+_opener = None
+
+counters = {
+    "hits": 0,
+    "misses": 0,
+    "opens": 0,
+    "evictions": 0
+}
+
+
+def init(opener):
+    # opener(user_id) -> vectorstore, or None when nothing is persisted
+    global _opener
+    _opener = opener
+
+
+def _resume_version(user_id, vectorstore):
+    # Hash of the resume file the user's chunks came from
+    found = vectorstore.get(where={"user_id": user_id}, limit=1, include=["metadatas"])
+    if not found["metadatas"]:
+        return None
+    return (found["metadatas"][0] or {}).get("resume_hash")
+
+
+def _entry(user_id, vectorstore):
+    now = time.time()
+    return {
+        "vectorstore": vectorstore,
+        "retriever": vectorstore.as_retriever(
+            search_kwargs={
+                "k": Config.RESUME_RETRIEVER_K,
+                "filter": {"user_id": user_id}
+            }
+        ),
+        "version": _resume_version(user_id, vectorstore),
+        "version_checked": now,
+        "last_used": now
+    }
+
+
+def _evict_locked(now):
+    cutoff = now - Config.RETRIEVER_CACHE_IDLE_SECONDS
+
+    for user_id in [uid for uid, e in _entries.items() if e["last_used"] < cutoff]:
+        del _entries[user_id]
+        counters["evictions"] += 1
+
+    while len(_entries) > Config.RETRIEVER_CACHE_SIZE:
+        _entries.popitem(last=False)
+        counters["evictions"] += 1
+
+
+def put(user_id, vectorstore):
+    entry = _entry(user_id, vectorstore)
+
+    with _lock:
+        _entries[user_id] = entry
+        _entries.move_to_end(user_id)
+        _evict_locked(time.time())
+
+    return entry
+
+
+def get(user_id):
+    now = time.time()
+
+    with _lock:
+        _evict_locked(now)
+        entry = _entries.get(user_id)
+        if entry:
+            entry["last_used"] = now
+            _entries.move_to_end(user_id)
+            counters["hits"] += 1
+        else:
+            counters["misses"] += 1
+
+    if entry:
+        # Another worker may have re-ingested the resume; re-read the
+        # version now and then (metadata only, no embedding involved)
+        if now - entry["version_checked"] > Config.RETRIEVER_VERSION_CHECK_SECONDS:
+            entry["version"] = _resume_version(user_id, entry["vectorstore"])
+            entry["version_checked"] = now
+        return entry
+
+    vectorstore = _opener(user_id) if _opener else None
+    if vectorstore is None:
+        return None
+
+    with _lock:
+        counters["opens"] += 1
+
+    return put(user_id, vectorstore)
+
+
+def get_retriever(user_id):
+    entry = get(user_id)
+    return entry["retriever"] if entry else None
+
+
+def invalidate(user_id):
+    with _lock:
+        _entries.pop(user_id, None)
+
+
+def stats():
+    with _lock:
+        data = dict(counters)
+        data["size"] = len(_entries)
+        data["max_size"] = Config.RETRIEVER_CACHE_SIZE
+    return data
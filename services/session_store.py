@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from config import Config
+
+
+# =================== Interview Session Store ===================
+# Interview transcripts live server side; the cookie only carries an
+# opaque session id. "memory" is a per-process LRU (fine for a single
+# worker), "mongo" shares state across workers and restarts.
+
+class MemorySessionStore:
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, sid, key):
+        with self._lock:
+            entry = self._data.get((sid, key))
+            if not entry:
+                return None
+            if entry[0] < time.time():
+                del self._data[(sid, key)]
+                return None
+            self._data.move_to_end((sid, key))
+            return list(entry[1])
+
+    def save(self, sid, key, value):
+        with self._lock:
+            self._data[(sid, key)] = (time.time() + self.ttl, list(value))
+            self._data.move_to_end((sid, key))
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, sid, key):
+        with self._lock:
+            self._data.pop((sid, key), None)
+
+
+class MongoSessionStore:
+
+    def __init__(self, collection, ttl):
+        self.collection = collection
+        self.ttl = ttl
+
+    def load(self, sid, key):
+        # Expired even when the TTL index is missing or hasn't swept yet
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.ttl)
+        doc = self.collection.find_one(
+            {"_id": f"{sid}:{key}", "updated_at": {"$gt": cutoff}}, {"value": 1}
+        )
+        return doc["value"] if doc else None
+
+    def save(self, sid, key, value):
+        self.collection.update_one(
+            {"_id": f"{sid}:{key}"},
+            {"$set": {
+                "sid": sid,
+                "key": key,
+                "value": value,
+                "updated_at": datetime.now(timezone.utc)
+            }},
+            upsert=True
+        )
+
+    def delete(self, sid, key):
+        self.collection.delete_one({"_id": f"{sid}:{key}"})
+
+
+_store = None
+
+
+def init(collection):
+    global _store
+
+    if Config.SESSION_STORE == "mongo":
+        _store = MongoSessionStore(collection, Config.SESSION_STORE_TTL)
+    else:
+        _store = MemorySessionStore(
+            Config.SESSION_STORE_MAX_ENTRIES, Config.SESSION_STORE_TTL
+        )
+
+
+def load(sid, key):
+    return _store.load(sid, key)
+
+
+def save(sid, key, value):
+    _store.save(sid, key, value)
+
+
+def delete(sid, key):
+    _store.delete(sid, key)
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import threading
+import time
+import uuid
+
+from services import llm_executor
+
+
+# =================== Streamed LLM Replies (SSE) ===================
+# Under WSGI (app:app) a streamed reply is a sync generator over
+# llm_executor.stream(), so the request thread is held until the last
+# token. Under the ASGI entry point (asgi.py) the view only registers
+# the job and returns an empty response carrying the internal X-LLM-Stream
+# header; DeferredStreamMiddleware then streams the job on the server's
+# event loop with llm_executor.astream(), after the WSGI thread has been
+# released. The events are the same either way:
+#   data: {"token": ...}            one per chunk
+#   event: done  {"reply": ...}     after on_complete(reply) has run
+#   event: error {"error": ...}     on timeout or LLM failure
+
+TIMEOUT_REPLY = "The interviewer is taking too long to respond. Please send your answer again."
+ERROR_REPLY = "Could not generate a reply."
+
+HEADER = "X-LLM-Stream"
+ENVIRON_KEY = "sse_bridge.deferred"
+
+# A registered job is picked up as soon as the view returns; anything
+# older was orphaned by a failed response and is dropped.
+JOB_TTL = 60
+
+_jobs = {}
+_lock = threading.Lock()
+
+
+def _event(name, payload):
+    prefix = f"event: {name}\n" if name else ""
+    return f"{prefix}data: {json.dumps(payload)}\n\n"
+
+
+def _error_event(error):
+    if isinstance(error, llm_executor.LLMTimeout):
+        return _event("error", {"error": TIMEOUT_REPLY})
+
+    print("LLM stream error:", error)
+    return _event("error", {"error": ERROR_REPLY})
+
+
+def events(chunks, on_complete=None):
+    # Sync SSE generator for WSGI responses
+    parts = []
+    try:
+        for text in chunks:
+            parts.append(text)
+            yield _event(None, {"token": text})
+    except Exception as e:
+        yield _error_event(e)
+        return
+
+    reply = "".join(parts)
+    if on_complete:
+        on_complete(reply)
+
+    yield _event("done", {"reply": reply})
+
+
+async def aevents(runnable, value, on_complete=None):
+    # Async SSE generator; on_complete (Mongo writes) runs in a worker
+    # thread so it never blocks the event loop
+    parts = []
+    try:
+        async for text in llm_executor.astream(runnable, value):
+            parts.append(text)
+            yield _event(None, {"token": text})
+    except Exception as e:
+        yield _error_event(e)
+        return
+
+    reply = "".join(parts)
+    if on_complete:
+        await asyncio.to_thread(on_complete, reply)
+
+    yield _event("done", {"reply": reply})
+
+
+def register(runnable, value, on_complete=None):
+    now = time.monotonic()
+    job_id = uuid.uuid4().hex
+
+    with _lock:
+        for stale in [k for k, job in _jobs.items() if now - job["created"] > JOB_TTL]:
+            _jobs.pop(stale, None)
+
+        _jobs[job_id] = {
+            "runnable": runnable,
+            "value": value,
+            "on_complete": on_complete,
+            "created": now
+        }
+
+    return job_id
+
+
+def _take(job_id):
+    with _lock:
+        return _jobs.pop(job_id, None)
+
+
+class DeferredStreamMiddleware:
+    # ASGI middleware around the (WsgiToAsgi-wrapped) Flask app
+
+    def __init__(self, app):
+        self.app = app
+        self.header = HEADER.lower().encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        job = None
+
+        async def intercept(message):
+            nonlocal job
+
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", [])
+                job_id = next((v for k, v in headers if k.lower() == self.header), None)
+
+                if job_id is not None:
+                    job = _take(job_id.decode())
+                    # The placeholder body is empty; the real one has no length
+                    message = dict(message, headers=[
+                        (k, v) for k, v in headers
+                        if k.lower() not in (self.header, b"content-length")
+                    ])
+
+            elif message["type"] == "http.response.body" and job is not None:
+                # Swallow the empty placeholder body
+                return
+
+            await send(message)
+
+        await self.app(scope, receive, intercept)
+
+        if job is None:
+            return
+
+        # The WSGI thread is free again; stream on this loop until done
+        # or until the client goes away
+        streaming = asyncio.ensure_future(self._send_events(job, send))
+        disconnect = asyncio.ensure_future(self._wait_disconnect(receive))
+
+        try:
+            await asyncio.wait({streaming, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            streaming.cancel()
+            disconnect.cancel()
+
+    async def _send_events(self, job, send):
+        async for event in aevents(job["runnable"], job["value"], job["on_complete"]):
+            await send({"type": "http.response.body", "body": event.encode(), "more_body": True})
+
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def _wait_disconnect(self, receive):
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
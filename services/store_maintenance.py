@@ -0,0 +1,472 @@
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from langchain_community.vectorstores import Chroma
+from pymongo.errors import DuplicateKeyError
+
+from config import Config
+from services import ingest_jobs
+from services import resume_index
+from services import retrieval_cache
+from services import retriever_cache
+
+
+# =================== Resume Store Maintenance ===================
+# Keeps resumes/ proportional to the active users:
+#   - chunks in the shared index whose user is gone, is no longer premium
+#     or has no resume on file are deleted; chunks from an outdated resume
+#     are queued for re-ingestion,
+#   - resume files, legacy per-user Chroma stores and the stray
+#     resumes/resumes tree that nothing references any more are removed,
+#   - a user over RESUME_USER_QUOTA_BYTES (resume file plus the text and
+#     vectors of their chunks) loses their chunks, and the resume is marked failed
+#     so it is not re-ingested until they upload a smaller one,
+#   - over RESUME_INDEX_QUOTA_CHUNKS (live chunks in the shared index),
+#     the least recently active users' chunks are dropped (their resume
+#     file stays and is re-ingested on next use). The quota counts live
+#     chunks rather than the directory size, which deletes don't shrink,
+#   - HNSW segment directories Chroma no longer lists are removed and,
+#     after chunks were dropped, the SQLite file is vacuumed (local store
+#     only; a Chroma server manages its own files). HNSW files keep
+#     deleted vectors until the index is rebuilt (--rebuild-into).
+# Runs from `flask resume-store-maintenance` and on a timer in the app
+# (dry run unless STORE_MAINTENANCE_DELETE is set); a lock document makes
+# sure only one worker runs it at a time.
+
+SCAN_BATCH = 5000
+LOCK_NAME = "resume_store"
+
+_users = None
+_rag_sessions = None
+_locks = None
+_upload_folder = None
+_thread = None
+_thread_lock = threading.Lock()
+
+
+def init(users_collection, rag_collection, lock_collection, upload_folder):
+    global _users, _rag_sessions, _locks, _upload_folder
+    _users = users_collection
+    _rag_sessions = rag_collection
+    _locks = lock_collection
+    _upload_folder = upload_folder
+
+
+def dir_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _older_than_grace(path):
+    # Uploads are written to disk before the user document points at them
+    try:
+        return time.time() - os.path.getmtime(path) > Config.STORE_MAINTENANCE_GRACE_SECONDS
+    except OSError:
+        return False
+
+
+def _resume_filename(user):
+    return (user.get("profile") or {}).get("resume", {}).get("filename") or user.get("resume")
+
+
+def _load_users():
+    users = {}
+    for user in _users.find({}, {"subscription": 1, "profile.resume": 1, "resume": 1}):
+        users[str(user["_id"])] = user
+    return users
+
+
+def _vector_bytes(collection):
+    # float32 per dimension, read off any stored embedding
+    sample = collection.get(include=["embeddings"], limit=1)
+    return 4 * len(sample["embeddings"][0]) if sample["ids"] else 0
+
+
+def _index_usage():
+    # chunk count, estimated live bytes (text plus vector) and resume
+    # hashes per user in the shared index
+    collection = resume_index.shared_store()._collection
+    vector_bytes = _vector_bytes(collection)
+    usage = {}
+    offset = 0
+
+    while True:
+        batch = collection.get(include=["metadatas", "documents"], limit=SCAN_BATCH, offset=offset)
+        if not batch["ids"]:
+            break
+
+        for meta, text in zip(batch["metadatas"], batch["documents"]):
+            meta = meta or {}
+            entry = usage.setdefault(meta.get("user_id"), {"chunks": 0, "bytes": 0, "hashes": set()})
+            entry["chunks"] += 1
+            entry["bytes"] += len((text or "").encode()) + vector_bytes
+            entry["hashes"].add(meta.get("resume_hash"))
+
+        offset += len(batch["ids"])
+
+    return usage
+
+
+def _orphan_segments(index_dir):
+    # Chroma keeps one directory per vector segment, named by segment id
+    db_path = os.path.join(index_dir, "chroma.sqlite3")
+    if resume_index.is_remote() or not os.path.exists(db_path):
+        return []
+
+    conn = sqlite3.connect(db_path)
+    try:
+        live = {row[0] for row in conn.execute("SELECT id FROM segments")}
+    finally:
+        conn.close()
+
+    return [
+        os.path.join(index_dir, name) for name in os.listdir(index_dir)
+        if os.path.isdir(os.path.join(index_dir, name)) and name not in live
+    ]
+
+
+def _sqlite_fragmentation(index_dir):
+    db_path = os.path.join(index_dir, "chroma.sqlite3")
+    if resume_index.is_remote() or not os.path.exists(db_path):
+        return 0.0
+
+    conn = sqlite3.connect(db_path)
+    try:
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    finally:
+        conn.close()
+
+    return round(free / pages, 3) if pages else 0.0
+
+
+def _last_active(user_id, user):
+    uploaded = (user.get("profile") or {}).get("resume", {}).get("uploaded_at")
+    session = _rag_sessions.find_one({"_id": user_id}, {"updated_at": 1})
+    times = [t for t in (uploaded, session and session.get("updated_at")) if t]
+    if not times:
+        return datetime.min
+    return max(t.replace(tzinfo=None) for t in times)
+
+
+def scan():
+    users = _load_users()
+    index_dir = os.path.abspath(Config.RESUME_INDEX_DIR)
+    store_root = os.path.join(_upload_folder, "chroma_store")
+    resume_dir = os.path.join(_upload_folder, "user_resumes")
+
+    referenced = {_resume_filename(u) for u in users.values()} - {None}
+    usage = _index_usage()
+    index_bytes = dir_size(index_dir)
+
+    report = {
+        "index_bytes": index_bytes,
+        "index_chunks": sum(e["chunks"] for e in usage.values()),
+        "sqlite_free_ratio": _sqlite_fragmentation(index_dir),
+        "orphan_users": {},
+        "stale_users": {},
+        "orphan_segments": _orphan_segments(index_dir),
+        "orphan_files": [],
+        "legacy_stores": {},
+        "stray_dirs": [],
+        "users": {}
+    }
+
+    # ---------------- Shared index ----------------
+    for user_id, entry in usage.items():
+        user = users.get(user_id)
+        filename = user and _resume_filename(user)
+        path = filename and os.path.join(resume_dir, filename)
+
+        if user is None:
+            reason = "no_user"
+        elif user.get("subscription") != "premium":
+            reason = "not_premium"
+        elif not path or not os.path.exists(path):
+            reason = "no_resume"
+        else:
+            reason = None
+            if entry["hashes"] != {resume_index.file_hash(path)}:
+                report["stale_users"][user_id] = path
+
+        if reason:
+            report["orphan_users"][user_id] = reason
+
+        # Live estimate: the directory keeps deleted vectors, so a share
+        # of its size would grow as other users are dropped
+        file_bytes = dir_size(path) if path and os.path.exists(path) else 0
+        report["users"][user_id] = {
+            "chunks": entry["chunks"],
+            "resume_path": path or None,
+            "index_bytes": entry["bytes"],
+            "bytes": file_bytes + entry["bytes"]
+        }
+
+    # ---------------- Resume files ----------------
+    for folder in (_upload_folder, resume_dir):
+        if not os.path.isdir(folder):
+            continue
+        for name in os.listdir(folder):
+            path = os.path.join(folder, name)
+            if folder == _upload_folder and not os.path.isfile(path):
+                continue
+            if name not in referenced and _older_than_grace(path):
+                report["orphan_files"].append(path)
+
+    # ---------------- Legacy per-user stores ----------------
+    if os.path.isdir(store_root):
+        for name in os.listdir(store_root):
+            path = os.path.join(store_root, name)
+            if not os.path.isdir(path) or os.path.abspath(path) == index_dir:
+                continue
+            if name not in users:
+                report["legacy_stores"][path] = "no_user"
+            elif name in usage:
+                report["legacy_stores"][path] = "migrated"
+            else:
+                report["legacy_stores"][path] = "needs_migration"
+
+    stray = os.path.join(_upload_folder, "resumes")
+    if os.path.isdir(stray):
+        report["stray_dirs"].append(stray)
+
+    report["files_bytes"] = sum(dir_size(p) for p in report["orphan_files"])
+    report["total_bytes"] = dir_size(_upload_folder)
+    report["over_user_quota"] = [
+        uid for uid, u in report["users"].items()
+        if Config.RESUME_USER_QUOTA_BYTES and u["bytes"] > Config.RESUME_USER_QUOTA_BYTES
+        and uid not in report["orphan_users"]
+    ]
+    report["dropped_users"] = []
+
+    return report
+
+
+def _drop_user_chunks(report, user_id):
+    resume_index.delete_user_chunks(user_id)
+    retriever_cache.invalidate(user_id)
+    retrieval_cache.invalidate_user(user_id)
+    report["dropped_users"].append(user_id)
+
+
+def collect(report, delete=False):
+    # Returns what was (or, without delete, would be) removed
+    actions = []
+
+    for user_id, reason in report["orphan_users"].items():
+        actions.append(f"drop chunks of {user_id} ({reason})")
+        if delete:
+            _drop_user_chunks(report, user_id)
+
+    for user_id, path in report["stale_users"].items():
+        if user_id in report["over_user_quota"] or ingest_jobs.active_job(user_id):
+            continue
+        actions.append(f"re-ingest {user_id} (outdated resume hash)")
+        if delete:
+            ingest_jobs.enqueue(user_id, path)
+
+    for path in report["orphan_files"] + report["stray_dirs"] + report["orphan_segments"]:
+        actions.append(f"remove {path}")
+        if delete:
+            _remove(path)
+
+    for path, reason in report["legacy_stores"].items():
+        if reason == "needs_migration":
+            actions.append(f"keep {path} (run migrate-resume-stores)")
+            continue
+        actions.append(f"remove {path} ({reason})")
+        if delete:
+            _remove(path)
+
+    return actions
+
+
+def _remove(path):
+    try:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+    except OSError as e:
+        print(f"Could not remove {path}: {e}")
+
+
+def enforce_user_quota(report, delete=False):
+    # Drops the chunks of users over their quota and blocks re-ingestion
+    actions = []
+
+    for user_id in report["over_user_quota"]:
+        usage = report["users"][user_id]
+        actions.append(f"drop chunks of {user_id} ({usage['bytes']} bytes, over per-user quota)")
+        if delete:
+            _drop_user_chunks(report, user_id)
+            if usage["resume_path"]:
+                ingest_jobs.record_failure(
+                    user_id, usage["resume_path"],
+                    "resume is over the storage quota, please upload a shorter one"
+                )
+
+    return actions
+
+
+def enforce_index_quota(report, delete=False):
+    # Evicts the least recently active users' chunks until the index holds
+    # at most RESUME_INDEX_QUOTA_CHUNKS live chunks
+    quota = Config.RESUME_INDEX_QUOTA_CHUNKS
+    if not quota:
+        return []
+
+    # Chunks dropped above already count as freed
+    dropped = set(report["orphan_users"]) | set(report["over_user_quota"])
+    excess = report["index_chunks"] - quota - sum(
+        report["users"][uid]["chunks"] for uid in dropped if uid in report["users"]
+    )
+    if excess <= 0:
+        return []
+
+    users = _load_users()
+    actions = []
+
+    candidates = sorted(
+        (uid for uid in report["users"] if uid not in dropped and uid in users),
+        key=lambda uid: _last_active(uid, users[uid])
+    )
+
+    for user_id in candidates:
+        if excess <= 0:
+            break
+        freed = report["users"][user_id]["chunks"]
+        actions.append(f"evict {freed} chunks of {user_id} (over index quota)")
+        if delete:
+            _drop_user_chunks(report, user_id)
+        excess -= freed
+
+    return actions
+
+
+def compact():
+    # Vacuums Chroma's SQLite file; deleted rows otherwise keep their pages
+    db_path = os.path.join(Config.RESUME_INDEX_DIR, "chroma.sqlite3")
+    if resume_index.is_remote() or not os.path.exists(db_path):
+        return 0
+
+    before = os.path.getsize(db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    return before - os.path.getsize(db_path)
+
+
+def rebuild_into(target_dir):
+    # Copies the shared index into a fresh store, reusing stored embeddings.
+    # The HNSW graph is rebuilt without the tombstones left by deletes;
+    # point RESUME_INDEX_DIR at target_dir once it finishes.
+    source = resume_index.shared_store()._collection
+    fresh = Chroma(collection_name=resume_index.COLLECTION_NAME, persist_directory=target_dir)
+    copied = 0
+
+    while True:
+        batch = source.get(
+            include=["documents", "metadatas", "embeddings"],
+            limit=SCAN_BATCH, offset=copied
+        )
+        if not batch["ids"]:
+            break
+
+        fresh._collection.upsert(
+            ids=batch["ids"],
+            documents=batch["documents"],
+            metadatas=batch["metadatas"],
+            embeddings=[list(e) for e in batch["embeddings"]]
+        )
+        copied += len(batch["ids"])
+
+    fresh.persist()
+    return copied
+
+
+def run(delete=False, vacuum=False):
+    report = scan()
+    report["actions"] = (
+        collect(report, delete) +
+        enforce_user_quota(report, delete) +
+        enforce_index_quota(report, delete)
+    )
+
+    if report["dropped_users"]:
+        resume_index.persist()
+
+    # Deleted rows only give their pages back to the file after a VACUUM,
+    # so vacuum after any drop, or when the file is fragmented now
+    index_dir = os.path.abspath(Config.RESUME_INDEX_DIR)
+    if vacuum or report["dropped_users"] or \
+            (delete and _sqlite_fragmentation(index_dir) > Config.STORE_MAINTENANCE_VACUUM_RATIO):
+        report["vacuum_freed_bytes"] = compact()
+
+    report["index_bytes_after"] = dir_size(index_dir)
+    if report["dropped_users"] and not resume_index.is_remote():
+        report["actions"].append(
+            "HNSW files keep the deleted vectors: rebuild the index with "
+            "--rebuild-into to give their space back"
+        )
+
+    return report
+
+
+# ---------------- Scheduled run ----------------
+
+def _acquire_lock():
+    now = datetime.now(timezone.utc)
+    try:
+        _locks.find_one_and_update(
+            {"_id": LOCK_NAME, "$or": [
+                {"locked_until": {"$lt": now}},
+                {"locked_until": {"$exists": False}}
+            ]},
+            {"$set": {"locked_until": now + timedelta(seconds=Config.STORE_MAINTENANCE_INTERVAL)}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+def _scheduled():
+    while True:
+        time.sleep(Config.STORE_MAINTENANCE_INTERVAL)
+        try:
+            if _acquire_lock():
+                report = run(delete=Config.STORE_MAINTENANCE_DELETE)
+                print(f"Resume store maintenance: {len(report['actions'])} actions")
+        except Exception as e:
+            print("Resume store maintenance error:", e)
+
+
+def start():
+    global _thread
+
+    if Config.STORE_MAINTENANCE_INTERVAL <= 0:
+        return
+
+    with _thread_lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(
+                target=_scheduled, name="resume-store-maintenance", daemon=True
+            )
+            _thread.start()
@@ -0,0 +1,151 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from config import Config
+from services import model_registry
+
+
+# =================== Transcription Pool ===================
+# Whisper runs in separate processes, each holding its own loaded model,
+# so decoding never blocks the web worker and scales with cores.
+# TRANSCRIBE_WORKERS=0 falls back to transcribing inline.
+
+class QueueFull(Exception):
+    pass
+
+
+class TranscriptionTimeout(Exception):
+    pass
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Running + waiting jobs. A job that times out while running cannot be
+# cancelled, so the pool is recycled (its processes killed) to get the
+# worker and the slot back; other jobs in flight fail with it.
+_slots = threading.BoundedSemaphore(
+    max(Config.TRANSCRIBE_WORKERS, 1) + Config.TRANSCRIBE_QUEUE_SIZE
+)
+
+_worker_model = None
+
+
+# ---------------- Worker process side ----------------
+
+def _init_worker(model_name):
+    global _worker_model
+    import whisper
+    _worker_model = whisper.load_model(model_name, device="cpu")
+
+
+def _write_temp_audio(audio_bytes, suffix):
+    fd, path = tempfile.mkstemp(suffix=suffix, prefix="audio_")
+    with os.fdopen(fd, "wb") as f:
+        f.write(audio_bytes)
+    return path
+
+
+def _run_transcription(whisper_model, audio_bytes, suffix, options):
+    path = _write_temp_audio(audio_bytes, suffix)
+    try:
+        result = whisper_model.transcribe(path, **options)
+        return result["text"].strip()
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _transcribe_job(audio_bytes, suffix, options):
+    return _run_transcription(_worker_model, audio_bytes, suffix, options)
+
+
+# ---------------- Web process side ----------------
+
+def _get_executor():
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # spawn keeps torch/CUDA state out of forked gunicorn workers
+                _executor = ProcessPoolExecutor(
+                    max_workers=Config.TRANSCRIBE_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(Config.WHISPER_MODEL,)
+                )
+
+    return _executor
+
+
+def _reset_executor():
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _recycle_executor(executor):
+    global _executor
+
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+
+    processes = list((getattr(executor, "_processes", None) or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    for process in processes:
+        if process.is_alive():
+            process.kill()
+
+
+def transcribe(audio_bytes, suffix=".webm", **options):
+
+    if not _slots.acquire(blocking=False):
+        raise QueueFull()
+
+    if Config.TRANSCRIBE_WORKERS <= 0:
+        try:
+            return _run_transcription(
+                model_registry.get("whisper"), audio_bytes, suffix, options
+            )
+        finally:
+            _slots.release()
+
+    try:
+        executor = _get_executor()
+        future = executor.submit(
+            _transcribe_job, audio_bytes, suffix, options
+        )
+    except Exception:
+        _slots.release()
+        raise
+
+    future.add_done_callback(lambda _: _slots.release())
+
+    try:
+        return future.result(timeout=Config.TRANSCRIBE_TIMEOUT)
+
+    except FuturesTimeout:
+        if not future.cancel():
+            print("Transcription job hung, recycling the pool")
+            _recycle_executor(executor)
+        raise TranscriptionTimeout()
+
+    except BrokenProcessPool:
+        print("Transcription pool crashed, restarting")
+        _reset_executor()
+        raise
+
+
+def shutdown():
+    _reset_executor()
@@ -0,0 +1,200 @@
+import queue
+import threading
+import time
+import uuid
+
+from config import Config
+from services import transcription
+
+
+# =================== Chunked Transcription Streams ===================
+# The browser records short, self-contained segments (each one a full
+# webm file) and uploads them while the candidate is still talking.
+# Every stream has one background thread that transcribes its segments
+# in order, so partial text is ready long before the answer ends.
+#
+# Streams live in worker memory, so a stream's requests must reach the
+# same worker (sticky sessions or a single voice worker).
+
+_streams = {}
+_streams_lock = threading.Lock()
+
+_CLOSE = object()
+
+
+class StreamNotFound(Exception):
+    pass
+
+
+class TooManyChunks(Exception):
+    pass
+
+
+class TranscriptStream:
+
+    def __init__(self, user_id):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.parts = {}
+        self.pending = queue.Queue()
+        self.pending_count = 0
+        self.lock = threading.Lock()
+        self.closed = False
+        self.error = None
+        self.version = 0
+        self.updated_at = time.time()
+        self.finished = threading.Event()
+        self.changed = threading.Condition()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def text(self):
+        return " ".join(
+            self.parts[seq] for seq in sorted(self.parts) if self.parts[seq]
+        ).strip()
+
+    def status(self):
+        if self.error:
+            state = "failed"
+        elif self.finished.is_set():
+            state = "done"
+        elif self.closed:
+            state = "closing"
+        else:
+            state = "open"
+
+        return {
+            "stream_id": self.id,
+            "status": state,
+            "text": self.text(),
+            "chunks": len(self.parts),
+            "pending": self.pending_count,
+            "version": self.version,
+            "error": self.error
+        }
+
+    def _notify(self):
+        self.updated_at = time.time()
+        with self.changed:
+            self.version += 1
+            self.changed.notify_all()
+
+    def _transcribe_chunk(self, audio_bytes, suffix):
+        # Feeding the tail of the transcript as the prompt keeps
+        # wording and casing consistent across segment boundaries.
+        options = {}
+        previous = self.text()
+        if previous:
+            options["initial_prompt"] = previous[-200:]
+
+        # A full pool is waited out, but not forever: a wedged pool fails
+        # the stream instead of pinning this thread
+        deadline = time.monotonic() + Config.TRANSCRIBE_TIMEOUT
+
+        while True:
+            try:
+                return transcription.transcribe(audio_bytes, suffix=suffix, **options)
+            except transcription.QueueFull:
+                if time.monotonic() > deadline:
+                    raise transcription.QueueFull("transcription is busy, please try again")
+                time.sleep(0.5)
+
+    def _run(self):
+        while True:
+            item = self.pending.get()
+            if item is _CLOSE:
+                break
+
+            seq, audio_bytes, suffix = item
+            try:
+                self.parts[seq] = self._transcribe_chunk(audio_bytes, suffix)
+            except Exception as e:
+                print("Chunk transcription error:", e)
+                self.error = str(e) or e.__class__.__name__
+            finally:
+                with self.lock:
+                    self.pending_count -= 1
+                self._notify()
+
+        self.finished.set()
+        self._notify()
+
+
+def _expire_streams():
+    cutoff = time.time() - Config.TRANSCRIBE_STREAM_TTL
+
+    with _streams_lock:
+        for stream_id in [
+            sid for sid, s in _streams.items() if s.updated_at < cutoff
+        ]:
+            stream = _streams.pop(stream_id)
+            if not stream.closed:
+                stream.closed = True
+                stream.pending.put(_CLOSE)
+
+
+def open_stream(user_id):
+    _expire_streams()
+    stream = TranscriptStream(user_id)
+
+    with _streams_lock:
+        _streams[stream.id] = stream
+
+    return stream
+
+
+def get_stream(stream_id, user_id):
+    # Every stream request sweeps idle streams, not only new streams
+    _expire_streams()
+
+    stream = _streams.get(stream_id)
+    if not stream or stream.user_id != user_id:
+        raise StreamNotFound()
+    return stream
+
+
+def is_active(stream):
+    # False once the stream expired (e.g. the page was closed mid-answer)
+    _expire_streams()
+    return _streams.get(stream.id) is stream
+
+
+def add_chunk(stream_id, user_id, seq, audio_bytes, suffix=".webm"):
+    stream = get_stream(stream_id, user_id)
+
+    if stream.closed:
+        raise StreamNotFound()
+
+    with stream.lock:
+        if stream.pending_count >= Config.TRANSCRIBE_STREAM_MAX_PENDING:
+            raise TooManyChunks()
+        stream.pending_count += 1
+
+    stream.updated_at = time.time()
+    stream.pending.put((seq, audio_bytes, suffix))
+
+    return stream
+
+
+def wait_for_change(stream, version, timeout=15):
+    with stream.changed:
+        stream.changed.wait_for(
+            lambda: stream.version != version, timeout=timeout
+        )
+    return stream.status()
+
+
+def close_stream(stream_id, user_id, timeout=None):
+    stream = get_stream(stream_id, user_id)
+
+    if not stream.closed:
+        stream.closed = True
+        stream.pending.put(_CLOSE)
+
+    # A stream still transcribing is kept so the client can keep polling;
+    # _expire_streams drops it once it has been idle for the TTL
+    if stream.finished.wait(timeout or Config.TRANSCRIBE_TIMEOUT):
+        with _streams_lock:
+            _streams.pop(stream.id, None)
+
+    return stream.status()
@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from config import Config
+
+
+# =================== Weekly Usage Quota ===================
+# Interview usage is counted in one tiny document per user per UTC day
+# ("<user_id>:<YYYY-MM-DD>"). Each day's document also stores "prior",
+# the total of the previous USAGE_WINDOW_DAYS - 1 days, computed once
+# when the day's first interview is reserved. That makes the check and
+# the reservation a single conditional $inc on one document:
+#     count + prior < limit  ->  count += 1
+# so parallel submissions can never go over the limit. Old buckets expire
+# through a TTL index on expires_at.
+
+_collection = None
+
+
+def init(collection):
+    global _collection
+    _collection = collection
+
+
+def _today():
+    return datetime.now(timezone.utc).date()
+
+
+def _bucket_id(user_id, day):
+    return f"{user_id}:{day.isoformat()}"
+
+
+def _prior_sum(user_id, day):
+    ids = [
+        _bucket_id(user_id, day - timedelta(days=i))
+        for i in range(1, Config.USAGE_WINDOW_DAYS)
+    ]
+    return sum(doc.get("count", 0) for doc in _collection.find({"_id": {"$in": ids}}, {"count": 1}))
+
+
+def _new_bucket(user_id, day, prior):
+    expires = datetime(day.year, day.month, day.day, tzinfo=timezone.utc) + \
+        timedelta(days=Config.USAGE_WINDOW_DAYS + 1)
+    return {"user_id": user_id, "day": day.isoformat(), "prior": prior, "expires_at": expires}
+
+
+def reserve(user_id, limit=None):
+    # Takes one slot; returns the bucket id, or None when the quota is used up.
+    # limit=None counts usage without enforcing a limit (premium users).
+    day = _today()
+    bucket_id = _bucket_id(user_id, day)
+
+    query = {"_id": bucket_id}
+    if limit is not None:
+        query["$expr"] = {"$lt": [{"$add": ["$count", "$prior"]}, limit]}
+
+    for _ in range(2):
+        # Usual case: today's bucket exists, one indexed update
+        if _collection.find_one_and_update(
+            query, {"$inc": {"count": 1}}, return_document=ReturnDocument.AFTER
+        ):
+            return bucket_id
+
+        # First interview of the day (or the window is full)
+        prior = _prior_sum(user_id, day)
+        if limit is not None and prior >= limit:
+            return None
+
+        room = {"$lt": limit - prior} if limit is not None else {"$exists": False}
+        try:
+            _collection.update_one(
+                {"_id": bucket_id, "count": room},
+                {"$inc": {"count": 1}, "$setOnInsert": _new_bucket(user_id, day, prior)},
+                upsert=True
+            )
+            return bucket_id
+        except DuplicateKeyError:
+            # The bucket exists (created concurrently, or full): check again
+            continue
+
+    return None
+
+
+def release(bucket_id):
+    # Gives back a reserved slot when the interview could not be saved
+    _collection.update_one({"_id": bucket_id, "count": {"$gt": 0}}, {"$inc": {"count": -1}})
+
+
+def used(user_id):
+    day = _today()
+    bucket = _collection.find_one({"_id": _bucket_id(user_id, day)}, {"count": 1, "prior": 1})
+    if bucket:
+        return bucket.get("count", 0) + bucket.get("prior", 0)
+    return _prior_sum(user_id, day)
+
+
+def rebuild(interviews_collection):
+    # Rebuilds the window's buckets from interview history
+    today = _today()
+    start = today - timedelta(days=Config.USAGE_WINDOW_DAYS - 1)
+    since = datetime(start.year, start.month, start.day, tzinfo=timezone.utc)
+
+    counts = {}
+    for row in interviews_collection.aggregate([
+        {"$match": {"created_at": {"$gte": since}}},
+        {"$group": {
+            "_id": {
+                "user_id": "$user_id",
+                "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}}
+            },
+            "count": {"$sum": 1}
+        }}
+    ]):
+        counts.setdefault(row["_id"]["user_id"], {})[row["_id"]["day"]] = row["count"]
+
+    for user_id, days in counts.items():
+        for offset in range(Config.USAGE_WINDOW_DAYS):
+            day = start + timedelta(days=offset)
+            if day.isoformat() not in days:
+                continue
+
+            prior = sum(
+                days.get((day - timedelta(days=i)).isoformat(), 0)
+                for i in range(1, Config.USAGE_WINDOW_DAYS)
+            )
+            bucket = _new_bucket(user_id, day, prior)
+            bucket["count"] = days[day.isoformat()]
+            _collection.replace_one({"_id": _bucket_id(user_id, day)}, bucket, upsert=True)
+
+    return len(counts)
@@ -0,0 +1,134 @@
+from datetime import datetime, timezone
+
+from config import Config
+
+
+# =================== Per-User Interview Stats ===================
+# One small document per user, updated with $inc/$push whenever an
+# interview is stored, so the dashboard never has to read the history:
+#   count, per-score sums and counts, weekly buckets ("2026-W07": n) and
+# the last STATS_RECENT_LIMIT interview summaries (newest first).
+# rebuild() recomputes the document from history when it drifts, e.g.
+# after rescoring or a failed write.
+
+SCORE_FIELDS = (
+    "grammar_score",
+    "confidence_score",
+    "technical_score",
+    "clarity_score",
+    "overall_score"
+)
+
+_collection = None
+_interviews = None
+
+
+def init(stats_collection, interviews_collection):
+    global _collection, _interviews
+    _collection = stats_collection
+    _interviews = interviews_collection
+
+
+def week_key(created_at):
+    year, week, _ = created_at.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def _scores(interview):
+    feedback = interview.get("feedback")
+    if not isinstance(feedback, dict):
+        return {}
+    return {
+        field: feedback[field] for field in SCORE_FIELDS
+        if isinstance(feedback.get(field), (int, float))
+    }
+
+
+def _summary(interview, scores):
+    # Shaped like an interview document so templates can use either
+    return {
+        "_id": interview.get("_id"),
+        "question": (interview.get("question") or "")[:300],
+        "interview_type": interview.get("interview_type"),
+        "created_at": interview["created_at"],
+        "feedback": scores
+    }
+
+
+def record(interview):
+    # Call after inserting an interview (with its _id)
+    interview.setdefault("created_at", datetime.now(timezone.utc))
+    scores = _scores(interview)
+
+    inc = {"count": 1, f"weekly.{week_key(interview['created_at'])}": 1}
+    for field, value in scores.items():
+        inc[f"sums.{field}"] = value
+        inc[f"counts.{field}"] = 1
+
+    try:
+        _collection.update_one(
+            {"_id": interview["user_id"]},
+            {"$inc": inc,
+             "$push": {"recent": {
+                 "$each": [_summary(interview, scores)],
+                 "$position": 0,
+                 "$slice": Config.STATS_RECENT_LIMIT
+             }},
+             "$set": {"updated_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+    except Exception as e:
+        # The interview itself is saved; `flask rebuild-user-stats` repairs this
+        print("User stats update error:", e)
+
+
+def get(user_id):
+    # Users from before stats existed are backfilled on first read
+    return _collection.find_one({"_id": user_id}) or rebuild(user_id)
+
+
+def average(stats, field):
+    count = stats.get("counts", {}).get(field, 0)
+    return stats.get("sums", {}).get(field, 0) / count if count else 0
+
+
+def rebuild(user_id):
+    projection = {"question": 1, "interview_type": 1, "created_at": 1, "user_id": 1}
+    for field in SCORE_FIELDS:
+        projection[f"feedback.{field}"] = 1
+
+    stats = {
+        "_id": user_id, "count": 0, "sums": {}, "counts": {}, "weekly": {}, "recent": []
+    }
+
+    # Oldest first, so the newest summaries end up at the front
+    cursor = _interviews.find({"user_id": user_id}, projection).sort("created_at", 1)
+
+    for interview in cursor:
+        if not interview.get("created_at"):
+            interview["created_at"] = interview["_id"].generation_time
+
+        scores = _scores(interview)
+        stats["count"] += 1
+
+        week = week_key(interview["created_at"])
+        stats["weekly"][week] = stats["weekly"].get(week, 0) + 1
+
+        for field, value in scores.items():
+            stats["sums"][field] = stats["sums"].get(field, 0) + value
+            stats["counts"][field] = stats["counts"].get(field, 0) + 1
+
+        stats["recent"].insert(0, _summary(interview, scores))
+        del stats["recent"][Config.STATS_RECENT_LIMIT:]
+
+    stats["updated_at"] = datetime.now(timezone.utc)
+    _collection.replace_one({"_id": user_id}, stats, upsert=True)
+
+    return stats
+
+
+def rebuild_all():
+    users = _interviews.distinct("user_id")
+    for user_id in users:
+        rebuild(user_id)
+    return len(users)
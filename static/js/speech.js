@@ -9,3 +9,84 @@ function startRecognition() {
 
     recognition.start();
 }
+
+// ================= CHUNKED RECORDING =================
+// Records the answer as short self-contained segments and uploads each
+// one while the candidate keeps talking. onPartial(text) is called as
+// the server transcribes, and stop() resolves with the final transcript.
+async function startChunkedTranscription(onPartial, segmentMs = 5000) {
+    const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
+    const opened = await fetch("/transcribe/stream", { method: "POST" });
+    const { stream_id } = await opened.json();
+
+    let seq = 0;
+    let recording = true;
+    let recorder = null;
+    const uploads = [];
+
+    const events = new EventSource(`/transcribe/stream/${stream_id}/events`);
+    events.onmessage = function(event) {
+        const status = JSON.parse(event.data);
+        if (onPartial) onPartial(status.text);
+        if (status.status === "done" || status.status === "failed") events.close();
+    };
+
+    async function upload(blob, chunkSeq) {
+        const form = new FormData();
+        form.append("audio", blob, `chunk_${chunkSeq}.webm`);
+        form.append("seq", chunkSeq);
+
+        let response = await fetch(`/transcribe/stream/${stream_id}/chunk`, { method: "POST", body: form });
+        while (response.status === 429) {
+            const wait = parseInt(response.headers.get("Retry-After") || "1", 10) * 1000;
+            await new Promise(resolve => setTimeout(resolve, wait));
+            response = await fetch(`/transcribe/stream/${stream_id}/chunk`, { method: "POST", body: form });
+        }
+    }
+
+    // A fresh MediaRecorder per segment so every upload has its own container header
+    function recordSegment() {
+        recorder = new MediaRecorder(stream, { mimeType: "audio/webm" });
+        const chunkSeq = seq++;
+
+        recorder.ondataavailable = function(event) {
+            if (event.data.size > 0) uploads.push(upload(event.data, chunkSeq));
+        };
+        recorder.onstop = function() {
+            if (recording) recordSegment();
+        };
+
+        recorder.start();
+        setTimeout(() => { if (recorder.state === "recording") recorder.stop(); }, segmentMs);
+    }
+
+    recordSegment();
+
+    return {
+        stop: async function() {
+            recording = false;
+            if (recorder && recorder.state === "recording") {
+                await new Promise(resolve => {
+                    recorder.addEventListener("stop", resolve, { once: true });
+                    recorder.stop();
+                });
+            }
+            stream.getTracks().forEach(track => track.stop());
+
+            await Promise.all(uploads);
+            const closed = await fetch(`/transcribe/stream/${stream_id}/close`, { method: "POST" });
+            let status = await closed.json();
+
+            // Close returns early if segments are still being transcribed
+            while (status.status === "closing") {
+                await new Promise(resolve => setTimeout(resolve, 1000));
+                const polled = await fetch(`/transcribe/stream/${stream_id}`);
+                if (!polled.ok) break;
+                status = await polled.json();
+            }
+
+            events.close();
+            return status.text;
+        }
+    };
+}
@@ -0,0 +1,45 @@
+// ================= STREAMED AI REPLIES =================
+// POSTs to an SSE endpoint and calls onToken(text) for every token as it
+// arrives. Resolves with the full reply, rejects on an error event.
+async function streamReply(url, options, onToken) {
+    const response = await fetch(url, Object.assign({ method: "POST" }, options));
+
+    if (!response.ok || !response.body) {
+        throw new Error(`Stream request failed (${response.status})`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    let reply = "";
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+            const raw = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let eventName = "message";
+            let data = "";
+            raw.split("\n").forEach(line => {
+                if (line.startsWith("event:")) eventName = line.slice(6).trim();
+                else if (line.startsWith("data:")) data += line.slice(5).trim();
+            });
+            if (!data) continue;
+
+            const payload = JSON.parse(data);
+            if (eventName === "error") throw new Error(payload.error);
+            if (eventName === "done") return payload.reply;
+
+            reply += payload.token;
+            if (onToken) onToken(payload.token, reply);
+        }
+    }
+
+    return reply;
+}
@@ -0,0 +1,13 @@
+from app import app, start_background_services
+
+
+# =================== WSGI Entry Point ===================
+# Serve with a WSGI server, e.g.
+#
+#   gunicorn wsgi:app --workers 2 --threads 8
+#
+# Importing this module starts the background workers (resume ingestion)
+# in each serving process. Don't use gunicorn --preload: threads started
+# in the master do not survive the fork into the workers.
+
+start_background_services()